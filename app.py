@@ -2,26 +2,15 @@
 import streamlit as st
 import os
 from PIL import Image
-from backend.services.crop_service import recommend_crop
-from backend.services.fertilizer_service import recommend_fertilizer
-from backend.services.irrigation_service import predict_irrigation
-from backend.core.config import INPUT_LIMITS, CROP_MAPPING, FERTILIZER_MAPPING
+from backend.core.config import (
+    INPUT_LIMITS, CROP_MAPPING, FERTILIZER_MAPPING, REGIONS, SOIL_TYPES, SEASONS, F_SOIL_TYPES, F_CROP_TYPES
+)
 import requests
 
 # -------------------- Backend URL --------------------
 # Use Docker service name 'backend' if running in Docker; fallback to localhost
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 
-# -------------------- Static Dropdown Options --------------------
-REGIONS = ["North India", "South India", "East India", "West India", "Central India"]
-SOIL_TYPES = ["Sandy", "Loamy", "Clay", "Silty"]
-SEASONS = ["Rabi", "Kharif", "Zaid"]
-
-F_CROP_TYPES = [
-    "Pomegranate", "Tomato", "Wheat", "Watermelon", "Maize", "Oil seeds",
-    "Ground Nuts"
-]
-
 # ---------- Page Title ----------
 st.set_page_config(page_title="🌱 GrowWell Dashboard", layout="wide")
 st.markdown("<h1 style='color:#1b7a32'>🌱 GrowWell - Smart Farming Dashboard</h1>", unsafe_allow_html=True)
@@ -48,6 +37,8 @@ with tab_crop:
     if st.button("Predict Crop", key="predict_crop_btn"):
         with st.spinner("Predicting the best crop..."):
             try:
+                # Service modules (and the model) load on the first prediction, not page load
+                from backend.services.crop_service import recommend_crop
                 crop_result = recommend_crop(n, p, k, ph, temperature, humidity, rainfall)
                 if isinstance(crop_result, dict) and "error" in crop_result:
                     st.error(crop_result["error"])
@@ -86,7 +77,7 @@ with tab_fert:
     f_k = col6.slider("Potassium (kg/ha)", INPUT_LIMITS["k"][0], INPUT_LIMITS["k"][1], value=20)
 
     col7, col8 = st.columns(2)
-    f_soil = col7.selectbox("Soil Type", ["Loamy", "Sandy", "Clayey", "Red", "Black"])
+    f_soil = col7.selectbox("Soil Type", F_SOIL_TYPES)
     f_crop = col8.selectbox("Crop Type", F_CROP_TYPES)
 
     if st.button("Predict Fertilizer", key="predict_fert_btn"):
@@ -139,6 +130,7 @@ with tab_irrig:
     if st.button("Predict Irrigation", key="predict_ir_btn"):
         with st.spinner("Estimating irrigation water usage..."):
             try:
+                from backend.services.irrigation_service import predict_irrigation
                 irrigation_result = predict_irrigation(
                     crop_type=f_crop_for_irrigation,
                     soil_type=soil_type,
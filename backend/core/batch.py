@@ -0,0 +1,121 @@
+# backend/core/batch.py
+
+import time
+import traceback
+import numpy as np
+from backend.core.config import BATCH_CHUNK_SIZE
+from backend.core.metrics import span, observe_stage, count_error
+from backend.core.validation import range_check
+
+
+def prepare_batch(records, numeric_fields, text_fields=()):
+    """
+    Validate a list of input dicts column by column.
+
+    numeric_fields maps each record key to its INPUT_LIMITS key; text_fields
+    lists the string keys. Returns (frame, valid_rows, errors) where frame holds
+    only the valid rows (in input order), valid_rows their original positions and
+    errors maps an invalid row's position to its list of messages.
+    """
+    import pandas as pd
+
+    n_rows = len(records)
+    frame = pd.DataFrame.from_records(records, index=range(n_rows)) if n_rows else pd.DataFrame()
+    bad = np.zeros(n_rows, dtype=bool)
+    messages = {}
+
+    def flag(mask, message):
+        for i in np.flatnonzero(mask):
+            messages.setdefault(int(i), []).append(message(int(i)))
+        bad[mask] = True
+
+    # Numeric fields are range-checked together; messages are only built for failing cells
+    numeric = list(numeric_fields)
+    check = range_check(tuple((limit_key, field + " {:g}") for field, limit_key in numeric_fields.items()))
+    values = np.empty((n_rows, len(numeric)))
+    missing = np.zeros((n_rows, len(numeric)), dtype=bool)
+    for j, field in enumerate(numeric):
+        raw = frame[field] if field in frame else pd.Series([None] * n_rows, dtype=object)
+        values[:, j] = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=float)
+        missing[:, j] = raw.isna().to_numpy()
+    not_numeric = np.isnan(values) & ~missing
+    out_of_range = check.out_of_range(values)
+
+    if missing.any() or not_numeric.any() or out_of_range.any():
+        for j, field in enumerate(numeric):
+            flag(missing[:, j], lambda i, f=field: f"{f} is required")
+            flag(not_numeric[:, j], lambda i, f=field: f"{f} must be a number")
+            flag(out_of_range[:, j], lambda i, j=j: check.message(j, values[i, j]))
+    columns = {field: values[:, j] for j, field in enumerate(numeric)}
+
+    for field in text_fields:
+        raw = frame[field] if field in frame else pd.Series([None] * n_rows, dtype=object)
+        is_text = raw.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+        flag(~is_text, lambda i, f=field: f"{f} must be a string")
+        columns[field] = raw.to_numpy(dtype=object)
+
+    valid_rows = np.flatnonzero(~bad)
+    valid_frame = pd.DataFrame({field: values[valid_rows] for field, values in columns.items()})
+    return valid_frame, valid_rows, messages
+
+
+def run_batch(records, numeric_fields, text_fields, columns, predict, format_result,
+              error_label, chunk_size=BATCH_CHUNK_SIZE, endpoint="batch",
+              check=None, prepared=None):
+    """
+    Validate and score records in chunks with one predict call per chunk.
+
+    columns maps record keys to the model's training column names (in model order).
+    The services' prediction caches are not used: bulk rows rarely repeat and
+    would evict the hot single-request entries. check, when given, maps the validated frame
+    (model columns) to {row number: messages} for rows to reject before scoring.
+    prepared, when given, is a (frame, valid_rows, errors) result of
+    prepare_batch over these records (frame columns named by record keys) and
+    replaces validating them again, e.g. when one validated set of records
+    feeds several models.
+    Returns one entry per input record, in input order: format_result(prediction)
+    for scored rows and an error dict for rows that failed validation or prediction.
+    Stage timings and error counts are recorded under endpoint.
+    """
+    results = [None] * len(records)
+    with span(endpoint, "prepare"):
+        if prepared is None:
+            frame, valid_rows, errors = prepare_batch(records, numeric_fields, text_fields)
+        else:
+            frame, valid_rows, errors = prepared[0], prepared[1], dict(prepared[2])
+        frame = frame.rename(columns=columns)[list(columns.values())]
+        if check is not None:
+            rejected = check(frame)
+            if rejected:
+                keep = np.ones(len(frame), dtype=bool)
+                for j, details in rejected.items():
+                    errors[int(valid_rows[j])] = details
+                    keep[j] = False
+                frame, valid_rows = frame[keep], valid_rows[keep]
+    for i, details in errors.items():
+        results[i] = {"error": "Invalid input values", "details": details}
+    if errors:
+        count_error(endpoint, "invalid_input", len(errors))
+
+    predict_seconds = format_seconds = 0.0
+    for start in range(0, len(frame), chunk_size):
+        rows = valid_rows[start:start + chunk_size]
+        started = time.perf_counter()
+        try:
+            predictions = predict(frame.iloc[start:start + chunk_size])
+        except Exception as e:
+            traceback.print_exc()
+            count_error(endpoint, "exception", len(rows))
+            for i in rows:
+                results[i] = {"error": f"{error_label}: {str(e)}"}
+            continue
+        finally:
+            predicted = time.perf_counter()
+            predict_seconds += predicted - started
+        for i, prediction in zip(rows, predictions):
+            results[i] = format_result(prediction)
+        format_seconds += time.perf_counter() - predicted
+
+    observe_stage(endpoint, "predict", predict_seconds)
+    observe_stage(endpoint, "format", format_seconds)
+    return results
@@ -0,0 +1,117 @@
+# backend/core/cache.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from backend.core.config import (
+    CACHE_ENABLED, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_QUANTIZE, CACHE_MODEL_CHECK_SECONDS
+)
+from backend.core.metrics import register_stats
+
+class PredictionCache:
+    """
+    Bounded LRU + TTL cache of raw model predictions for one model.
+
+    Keys are canonical tuples of the validated features in model column order.
+    Numbers are normalized to float (so 10 and 10.0 share an entry) and, when
+    decimals is set, rounded to that many places; rows that round to the same key
+    share the first computed prediction. The cache empties itself when the model
+    file's mtime or size changes.
+    """
+
+    def __init__(self, name, model_path, max_entries, ttl_seconds, decimals=None,
+                 check_interval=CACHE_MODEL_CHECK_SECONDS):
+        self.name = name
+        self.model_path = model_path
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.decimals = decimals
+        self.check_interval = check_interval
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = self._model_signature()
+        self._next_check = time.monotonic() + check_interval
+        register_stats(f"cache.{name}", self.stats)
+
+    def key(self, values, version=None):
+        """Cache key for one row; version (the model version id) keeps A/B and reloaded models apart."""
+        if self.decimals is None:
+            return (version,) + tuple(float(v) if isinstance(v, (int, float)) else v for v in values)
+        return (version,) + tuple(round(float(v), self.decimals) if isinstance(v, (int, float)) else v for v in values)
+
+    def get(self, key):
+        """Return (True, prediction) on a hit, (False, None) otherwise."""
+        now = time.monotonic()
+        self._check_model(now)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            value, expires_at = entry
+            if expires_at < now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+    def _model_signature(self):
+        try:
+            stat = os.stat(self.model_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _check_model(self, now):
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        signature = self._model_signature()
+        if signature != self._signature:
+            self._signature = signature
+            self.clear()
+            self.invalidations += 1
+
+def prediction_cache(name, model_path):
+    """Build the configured cache for a model, or None when caching is disabled."""
+    if not CACHE_ENABLED:
+        return None
+    return PredictionCache(
+        name,
+        model_path,
+        max_entries=CACHE_MAX_ENTRIES[name],
+        ttl_seconds=CACHE_TTL_SECONDS,
+        decimals=CACHE_QUANTIZE.get(name)
+    )
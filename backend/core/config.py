@@ -1,6 +1,7 @@
 # backend/core/config.py
 
 import os
+import tempfile
 
 # Folder for saved models
 MODEL_PATHS = {
@@ -34,3 +35,126 @@ FERTILIZER_MAPPING = [
     'Urea', 'DAP', 'Potassium chloride', '17-17-17 ', '28-28', '20-20', '10-26-26', 
     'Superphosphate', '14-14-14', 'TSP'
 ]
+
+# Dropdown options offered by the Streamlit dashboard (app.py)
+REGIONS = ["North India", "South India", "East India", "West India", "Central India"]
+SOIL_TYPES = ["Sandy", "Loamy", "Clay", "Silty"]
+SEASONS = ["Rabi", "Kharif", "Zaid"]
+F_SOIL_TYPES = ["Loamy", "Sandy", "Clayey", "Red", "Black"]
+F_CROP_TYPES = [
+    "Pomegranate", "Tomato", "Wheat", "Watermelon", "Maize", "Oil seeds",
+    "Ground Nuts"
+]
+
+# Categorical inputs: also match category names ignoring case and extra spaces ("loamy" -> "Loamy")
+# and apply CATEGORY_ALIASES. Off by default: the encoders treat such spellings as unknown
+# categories, as they always have
+CATEGORY_NORMALIZE = os.getenv("GROWWELL_CATEGORY_NORMALIZE", "0") == "1"
+# Alternative spellings per column, used with GROWWELL_CATEGORY_NORMALIZE (matched ignoring case
+# and extra spaces; an alias only applies if the model knows its target)
+CATEGORY_ALIASES = {
+    "Soil_Type": {"Clayey": "Clay", "Silt": "Silty"},
+    "Crop_Type": {"Groundnut": "Ground Nuts", "Groundnuts": "Ground Nuts", "Oilseeds": "Oil seeds"},
+}
+# Unknown categories: "encoder" keeps the model encoder's own handling, "reject" fails validation
+CATEGORY_UNKNOWN = os.getenv("GROWWELL_CATEGORY_UNKNOWN", "encoder")
+# Optional category used for unknown values of a column, e.g. GROWWELL_CATEGORY_FALLBACK_SOIL_TYPE=Loamy
+CATEGORY_FALLBACKS = {
+    column: os.getenv(f"GROWWELL_CATEGORY_FALLBACK_{column.upper()}")
+    for column in ("Region", "Crop_Type", "Soil_Type", "Season")
+    if os.getenv(f"GROWWELL_CATEGORY_FALLBACK_{column.upper()}")
+}
+
+# Batch scoring: rows per model.predict call, and the largest request accepted
+BATCH_CHUNK_SIZE = int(os.getenv("GROWWELL_BATCH_CHUNK_SIZE", "2048"))
+BATCH_MAX_RECORDS = int(os.getenv("GROWWELL_BATCH_MAX_RECORDS", "50000"))
+
+# Opt-in micro-batching of concurrent single-record predictions
+MICROBATCH_ENABLED = os.getenv("GROWWELL_MICROBATCH", "0") == "1"
+MICROBATCH_WINDOW_MS = float(os.getenv("GROWWELL_MICROBATCH_WINDOW_MS", "2"))
+MICROBATCH_MAX_SIZE = int(os.getenv("GROWWELL_MICROBATCH_MAX_SIZE", "64"))
+
+# Prediction cache shared by the services (per-model entry limits)
+CACHE_ENABLED = os.getenv("GROWWELL_CACHE", "1") == "1"
+CACHE_MAX_ENTRIES = {
+    "crop": int(os.getenv("GROWWELL_CACHE_CROP_ENTRIES", "50000")),
+    "fertilizer": int(os.getenv("GROWWELL_CACHE_FERTILIZER_ENTRIES", "50000")),
+    "irrigation": int(os.getenv("GROWWELL_CACHE_IRRIGATION_ENTRIES", "50000")),
+}
+CACHE_TTL_SECONDS = float(os.getenv("GROWWELL_CACHE_TTL_SECONDS", "3600"))
+CACHE_MODEL_CHECK_SECONDS = float(os.getenv("GROWWELL_CACHE_MODEL_CHECK_SECONDS", "5"))
+# Optional rounding (decimal places) of numeric features before keying; unset = exact
+_cache_decimals = os.getenv("GROWWELL_CACHE_DECIMALS")
+CACHE_QUANTIZE = {name: int(_cache_decimals) for name in MODEL_PATHS} if _cache_decimals else {}
+
+# NumPy fast inference path (set to 0 to force the original DataFrame path)
+FASTPATH_ENABLED = os.getenv("GROWWELL_FASTPATH", "1") == "1"
+
+# Serve tree ensembles from their compiled .npz (python -m backend.core.treecompile) when present
+COMPILED_MODELS_ENABLED = os.getenv("GROWWELL_COMPILED_MODELS", "1") == "1"
+# Optional: calls with more rows than this go to the native booster (the .pkl, loaded on the first
+# such call, which imports xgboost). 0 keeps every call on the NumPy-only compiled evaluator
+COMPILED_MAX_ROWS = int(os.getenv("GROWWELL_COMPILED_MAX_ROWS", "0"))
+
+# Precomputed prediction tables for hot input regions (python -m backend.core.lookup), answered before the model.
+# GROWWELL_LOOKUP_REGIONS is an optional JSON file of regions per model (default: the dashboard's slider sweeps)
+LOOKUP_ENABLED = os.getenv("GROWWELL_LOOKUP", "1") == "1"
+LOOKUP_REGIONS_FILE = os.getenv("GROWWELL_LOOKUP_REGIONS")
+LOOKUP_MAX_CELLS = int(os.getenv("GROWWELL_LOOKUP_MAX_CELLS", "5000000"))
+
+# Model registry: models load on first use. Compiled .npz models and NumPy arrays in .pkl files
+# are memory-mapped read-only, so worker processes share their pages
+MODEL_MMAP = os.getenv("GROWWELL_MODEL_MMAP", "1") == "1"
+REGISTRY_RETRY_SECONDS = float(os.getenv("GROWWELL_REGISTRY_RETRY_SECONDS", "30"))
+
+# Hot reload: poll model files and swap in new versions without a restart
+MODEL_RELOAD_ENABLED = os.getenv("GROWWELL_MODEL_RELOAD", "0") == "1"
+MODEL_RELOAD_POLL_SECONDS = float(os.getenv("GROWWELL_MODEL_RELOAD_POLL_SECONDS", "10"))
+# A/B serving: optional candidate model file per model and the share of traffic it gets
+MODEL_CANDIDATE_PATHS = {
+    name: os.getenv(f"GROWWELL_CANDIDATE_{name.upper()}")
+    for name in MODEL_PATHS
+    if os.getenv(f"GROWWELL_CANDIDATE_{name.upper()}")
+}
+MODEL_CANDIDATE_PERCENT = float(os.getenv("GROWWELL_CANDIDATE_PERCENT", "0"))
+
+# Inference executor behind the async routes ("thread" or "process")
+INFERENCE_EXECUTOR = os.getenv("GROWWELL_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("GROWWELL_EXECUTOR_WORKERS", str(os.cpu_count() or 1)))
+INFERENCE_MAX_QUEUE = int(os.getenv("GROWWELL_EXECUTOR_MAX_QUEUE", "256"))
+INFERENCE_TIMEOUT_SECONDS = float(os.getenv("GROWWELL_INFERENCE_TIMEOUT_SECONDS", "10"))
+INFERENCE_RETRY_AFTER_SECONDS = int(os.getenv("GROWWELL_RETRY_AFTER_SECONDS", "1"))
+
+# Weather enrichment: missing temperature / humidity / rainfall filled from the weather at latitude / longitude.
+# Provider "none" (off), "file" (JSON table of geohash prefix -> values) or "openweather" (needs OPENWEATHER_API_KEY)
+WEATHER_PROVIDER = os.getenv("GROWWELL_WEATHER_PROVIDER", "none")
+WEATHER_FILE = os.getenv("GROWWELL_WEATHER_FILE", "weather.json")
+OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
+# Lookups are shared per geohash cell (precision 5 is about 5 x 5 km) and time bucket
+WEATHER_GEOHASH_PRECISION = int(os.getenv("GROWWELL_WEATHER_GEOHASH_PRECISION", "5"))
+WEATHER_BUCKET_SECONDS = float(os.getenv("GROWWELL_WEATHER_BUCKET_SECONDS", "3600"))
+WEATHER_TTL_SECONDS = float(os.getenv("GROWWELL_WEATHER_TTL_SECONDS", "1800"))
+WEATHER_MAX_ENTRIES = int(os.getenv("GROWWELL_WEATHER_MAX_ENTRIES", "10000"))
+WEATHER_TIMEOUT_SECONDS = float(os.getenv("GROWWELL_WEATHER_TIMEOUT_SECONDS", "5"))
+# Distinct cells fetched at once when a batch is enriched
+WEATHER_PREFETCH_CONCURRENCY = int(os.getenv("GROWWELL_WEATHER_PREFETCH_CONCURRENCY", "8"))
+
+# Preforking server (python -m backend.core.prefork): HTTP worker processes sharing the parent's models
+SERVER_WORKERS = int(os.getenv("GROWWELL_SERVER_WORKERS", str(os.cpu_count() or 1)))
+
+# Sampling profiler (per worker process), toggled with SIGUSR2 or the /debug/profile endpoints
+PROFILER_ENABLED = os.getenv("GROWWELL_PROFILER", "0") == "1"
+PROFILER_INTERVAL_MS = float(os.getenv("GROWWELL_PROFILER_INTERVAL_MS", "5"))
+PROFILER_MAX_SECONDS = float(os.getenv("GROWWELL_PROFILER_MAX_SECONDS", "60"))
+PROFILER_OUTPUT_DIR = os.getenv("GROWWELL_PROFILER_OUTPUT_DIR", tempfile.gettempdir())
+
+# /score/stream: request bodies beyond this many bytes are spooled to a temp file
+STREAM_SPOOL_BYTES = int(os.getenv("GROWWELL_STREAM_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+# What-if sweeps: largest grid (points) scored per request
+SWEEP_MAX_POINTS = int(os.getenv("GROWWELL_SWEEP_MAX_POINTS", "10000"))
+
+# Cold start: load and warm up models in the background at startup; /ready answers 200 once done
+WARMUP_ENABLED = os.getenv("GROWWELL_WARMUP", "1") == "1"
+# Comma-separated models to warm up (default: all)
+WARMUP_MODELS = [name.strip() for name in os.getenv("GROWWELL_WARMUP_MODELS", "").split(",") if name.strip()]
@@ -0,0 +1,146 @@
+# backend/core/executor.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi import Header, HTTPException
+from backend.core.config import (
+    INFERENCE_EXECUTOR, INFERENCE_WORKERS, INFERENCE_MAX_QUEUE,
+    INFERENCE_TIMEOUT_SECONDS, INFERENCE_RETRY_AFTER_SECONDS
+)
+from backend.core.metrics import register_stats, observe_stage, count_error
+
+def _preload_models():
+    # Process-pool initializer: load every available model once per process
+    # Imported for their side effect of registering the models
+    from backend.services import crop_service, fertilizer_service, irrigation_service  # noqa: F401
+    from backend.core.registry import registry, ModelUnavailable
+
+    for name in ("crop", "fertilizer", "irrigation"):
+        try:
+            registry.get(name, allow_candidate=False)
+        except ModelUnavailable:
+            pass
+
+def _call(model_name, fn, args, kwargs, submitted):
+    # Runs in the worker: the served model version is only visible from there
+    from backend.core.registry import registry
+
+    # perf_counter is system-wide on Linux, so this also holds for process workers
+    queued = time.perf_counter() - submitted
+    result = fn(*args, **kwargs)
+    return result, registry.version_headers(model_name), queued
+
+class InferenceExecutor:
+    """
+    Runs blocking service calls off the event loop on a dedicated pool.
+
+    kind "thread" uses a thread pool (NumPy and the tree evaluators release the
+    GIL for most of a predict); kind "process" uses a process pool whose
+    workers preload the models. At most workers + max_queue calls are accepted
+    at once: beyond that run() answers HTTP 503 with Retry-After. A call that
+    does not finish within its deadline answers HTTP 504; if it had not started
+    yet it is dropped from the queue.
+
+    With the process pool, the stage timings the services record stay in the
+    worker processes; only the queue/executor stages reach /metrics.
+    """
+
+    def __init__(self, kind=INFERENCE_EXECUTOR, workers=INFERENCE_WORKERS, max_queue=INFERENCE_MAX_QUEUE,
+                 timeout=INFERENCE_TIMEOUT_SECONDS, retry_after=INFERENCE_RETRY_AFTER_SECONDS):
+        self.kind = kind
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def configure(self, workers):
+        """Change the pool size; only possible before the first call."""
+        with self._lock:
+            if self._pool is not None:
+                raise RuntimeError("Inference pool is already running")
+            self.capacity += workers - self.workers
+            self.workers = workers
+
+    def callers(self):
+        """
+        Most threads of this process that can run service calls at once: the
+        pool size for thread workers, 1 inside each single-threaded process worker.
+        """
+        return 1 if self.kind == "process" else self.workers
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == "process":
+                        self._pool = ProcessPoolExecutor(self.workers, initializer=_preload_models)
+                    else:
+                        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="inference")
+        return self._pool
+
+    async def run(self, model_name, fn, *args, timeout=None, **kwargs):
+        """
+        Run fn(*args, **kwargs); returns (result, model version headers).
+        Queue wait and total time are recorded as the "queue" and "executor"
+        stages of fn's name.
+        """
+        endpoint = fn.__name__
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                count_error(endpoint, "rejected")
+                raise HTTPException(
+                    status_code=503,
+                    detail="Inference queue is full, retry later",
+                    headers={"Retry-After": str(self.retry_after)}
+                )
+            self.pending += 1
+
+        submitted = time.perf_counter()
+        future = self._get_pool().submit(_call, model_name, fn, args, kwargs, submitted)
+        future.add_done_callback(self._release)
+        try:
+            result, headers, queued = await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            count_error(endpoint, "timeout")
+            raise HTTPException(status_code=504, detail="Inference deadline exceeded")
+        observe_stage(endpoint, "queue", queued)
+        observe_stage(endpoint, "executor", time.perf_counter() - submitted)
+        return result, headers
+
+    def _release(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts
+        }
+
+inference = InferenceExecutor()
+register_stats("executor", inference.stats)
+
+def request_timeout(x_request_timeout: float = Header(None)):
+    """Per-request deadline in seconds from the X-Request-Timeout header, capped by the server default."""
+    if x_request_timeout is None or x_request_timeout <= 0:
+        return INFERENCE_TIMEOUT_SECONDS
+    return min(x_request_timeout, INFERENCE_TIMEOUT_SECONDS)
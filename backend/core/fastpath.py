@@ -0,0 +1,318 @@
+# backend/core/fastpath.py
+
+import threading
+import traceback
+import warnings
+import numpy as np
+from backend.core.config import FASTPATH_ENABLED, CATEGORY_UNKNOWN, COMPILED_MAX_ROWS
+from backend.core.vocab import UNKNOWN, build_vocabularies
+
+class _Block:
+    """One output block of the feature matrix: numeric passthrough or an encoder."""
+
+    def __init__(self, kind, positions, categories=(), unknown=None):
+        self.kind = kind                # "numeric", "onehot" or "ordinal"
+        self.positions = positions      # indexes into the input row
+        self.categories = [list(cats) for cats in categories]
+        self.widths = [len(cats) for cats in categories]
+        self.unknown = unknown          # ordinal code for unknown categories; None = reject
+        self.width = sum(self.widths) if kind == "onehot" else len(positions)
+
+class FastPredictor:
+    """
+    Feeds NumPy arrays straight to a model's final estimator.
+
+    The feature layout (column order and any ColumnTransformer passthrough /
+    OneHotEncoder / OrdinalEncoder steps) is read from the fitted model once, so
+    prediction skips DataFrame construction and sklearn's column-name checks.
+    Input rows are value sequences in `columns` order. Categorical values are
+    encoded through a Vocabulary per column (see backend.core.vocab).
+    """
+
+    def __init__(self, estimator, blocks, columns, vocabularies=None):
+        self.estimator = estimator
+        self.blocks = blocks
+        self.columns = list(columns)
+        self.n_inputs = len(self.columns)
+        self.vocabularies = vocabularies if vocabularies is not None else build_vocabularies(blocks, self.columns)
+        self.width = sum(block.width for block in blocks)
+        # Estimators fitted on DataFrames warn on every ndarray predict; the fast path guarantees column order itself
+        self._named = hasattr(estimator, "feature_names_in_")
+        self._local = threading.local()
+
+    @property
+    def classes(self):
+        return getattr(self.estimator, "classes_", getattr(self.estimator, "classes", None))
+
+    def predict_rows(self, rows):
+        return self._call(self.estimator.predict, self._encode_rows(rows))
+
+    def predict_columns(self, columns):
+        """Predict from one array per input column (batch path)."""
+        return self._call(self.estimator.predict, self._encode_columns(columns))
+
+    def predict_proba_rows(self, rows):
+        return self._call(self.estimator.predict_proba, self._encode_rows(rows))
+
+    def predict_proba_columns(self, columns):
+        return self._call(self.estimator.predict_proba, self._encode_columns(columns))
+
+    def _call(self, predict, X):
+        if not self._named:
+            return predict(X)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            return predict(X)
+
+    def _encode_rows(self, rows):
+        if len(rows) == 1:
+            # Reuse a per-thread buffer for the common single-record case
+            X = getattr(self._local, "buffer", None)
+            if X is None:
+                X = self._local.buffer = np.zeros((1, self.width))
+            else:
+                X.fill(0.0)
+        else:
+            X = np.zeros((len(rows), self.width))
+        columns = list(zip(*rows)) if rows else [()] * self.n_inputs
+        self._fill(X, columns)
+        return X
+
+    def _encode_columns(self, columns):
+        X = np.zeros((len(columns[0]), self.width))
+        self._fill(X, columns)
+        return X
+
+    def _fill(self, X, columns):
+        offset = 0
+        for block in self.blocks:
+            for j, position in enumerate(block.positions):
+                values = columns[position]
+                if block.kind == "numeric":
+                    X[:, offset] = values
+                    offset += 1
+                    continue
+                codes = self.vocabularies[position].encode(values)
+                unknown = codes == UNKNOWN
+                if block.kind == "ordinal":
+                    if unknown.any():
+                        if block.unknown is None:
+                            value = values[int(np.flatnonzero(unknown)[0])]
+                            raise ValueError(f"Found unknown category {value!r}")
+                        codes = np.where(unknown, block.unknown, codes)
+                    X[:, offset] = codes
+                    offset += 1
+                else:
+                    # Unknown categories leave their one-hot group all zero (handle_unknown="ignore")
+                    known = np.flatnonzero(~unknown)
+                    X[known, offset + codes[known]] = 1.0
+                    offset += block.widths[j]
+
+def _transformer_block(transformer, positions):
+    name = type(transformer).__name__
+    if transformer == "passthrough" or (name == "FunctionTransformer" and transformer.func is None):
+        return _Block("numeric", positions)
+    if name == "OneHotEncoder" and transformer.drop is None and getattr(transformer, "_infrequent_enabled", False) is False:
+        if transformer.handle_unknown != "ignore":
+            return None
+        return _Block("onehot", positions, transformer.categories_)
+    if name == "OrdinalEncoder" and getattr(transformer, "_infrequent_enabled", False) is False:
+        unknown = transformer.unknown_value if transformer.handle_unknown == "use_encoded_value" else None
+        return _Block("ordinal", positions, transformer.categories_, unknown)
+    return None
+
+def _extract_blocks(model, columns):
+    """Return (estimator, blocks) for supported models, or None."""
+    position = {column: i for i, column in enumerate(columns)}
+    steps = getattr(model, "steps", None)
+    if steps is None:
+        names = list(getattr(model, "feature_names_in_", columns))
+        return model, [_Block("numeric", [position[name] for name in names])]
+
+    if len(steps) != 2 or type(steps[0][1]).__name__ != "ColumnTransformer":
+        return None
+    preprocessor, estimator = steps[0][1], steps[1][1]
+    if getattr(preprocessor, "sparse_output_", False):
+        return None
+
+    blocks = []
+    for name, transformer, transformer_columns in preprocessor.transformers_:
+        if transformer == "drop" or len(transformer_columns) == 0:
+            continue
+        block = _transformer_block(transformer, [position[column] for column in transformer_columns])
+        if block is None:
+            return None
+        blocks.append(block)
+    return estimator, blocks
+
+def compile_model(model, columns, sample_row):
+    """
+    Build a FastPredictor for model, or None if its layout is not supported or it
+    does not reproduce model.predict on sample_row (a row in `columns` order).
+    """
+    import pandas as pd
+
+    try:
+        extracted = _extract_blocks(model, columns)
+        if extracted is None:
+            return None
+        predictor = FastPredictor(extracted[0], extracted[1], columns)
+        expected = model.predict(pd.DataFrame([sample_row], columns=columns))
+        if not np.array_equal(predictor.predict_rows([sample_row]), expected):
+            return None
+        return predictor
+    except Exception:
+        traceback.print_exc()
+        return None
+
+def top_k(probabilities, class_names, k):
+    """
+    The k most probable (name, probability) pairs of one probability row,
+    most probable first (ties in class order, as argmax breaks them).
+    class_names[i] names probability column i.
+    """
+    best = np.argsort(-probabilities, kind="stable")[:k]
+    return [(class_names[i], float(probabilities[i])) for i in best]
+
+class Predictor:
+    """
+    Runs a loaded model through the NumPy fast path when it compiled, otherwise
+    (or with GROWWELL_FASTPATH=0) through the original DataFrame path.
+
+    compiled, when given, is a ready FastPredictor (e.g. a tree ensemble loaded
+    from .npz) and model may then be None. With compiled_max_rows > 0, calls
+    with more rows go to the native model instead, which load_model returns
+    (loaded on the first such call). label_name, when given, maps a class
+    label to its display name; class_names (one per predict_proba column) is
+    computed from it once at load.
+
+    Categorical inputs go through the model's vocabularies on both paths, so
+    normalization, aliases and fallbacks apply either way when configured; with
+    none of them the DataFrame path hands frames to the model unchanged. With GROWWELL_CATEGORY_UNKNOWN=reject
+    the services check category_errors / category_error_rows before predicting.
+    """
+
+    def __init__(self, model, columns, sample_row, use_fastpath=FASTPATH_ENABLED, compiled=None, label_name=None,
+                 load_model=None, compiled_max_rows=COMPILED_MAX_ROWS):
+        self.model = model
+        self.columns = list(columns)
+        self.sample_row = list(sample_row)
+        self.compiled_max_rows = compiled_max_rows
+        self._load_model = load_model if compiled is not None and compiled_max_rows > 0 else None
+        self._bulk = None
+        self._bulk_lock = threading.Lock()
+        if compiled is not None:
+            self.fast = compiled
+        else:
+            self.fast = compile_model(model, self.columns, sample_row) if use_fastpath else None
+        self.classes = self.fast.classes if self.fast is not None else getattr(model, "classes_", None)
+        self.vocabularies = self.fast.vocabularies if self.fast is not None else self._model_vocabularies()
+        self.reject_unknown = CATEGORY_UNKNOWN == "reject"
+        self.class_names = None
+        if label_name is not None and self.classes is not None:
+            self.class_names = [label_name(label) for label in self.classes]
+
+    def _model_vocabularies(self):
+        try:
+            extracted = _extract_blocks(self.model, self.columns)
+        except Exception:
+            extracted = None
+        return build_vocabularies(extracted[1], self.columns) if extracted is not None else {}
+
+    def canonical_category(self, column, value):
+        """
+        The model's own spelling of a categorical value (aliases applied, but
+        not the column's fallback), or None if the column's vocabulary doesn't
+        know it. Values of columns without a vocabulary are returned unchanged.
+        """
+        for vocab in self.vocabularies.values():
+            if vocab.column == column:
+                return vocab.lookup(value)
+        return value
+
+    def category_errors(self, row):
+        """Unknown-category messages for one row (always empty unless unknown categories are rejected)."""
+        if not self.reject_unknown:
+            return []
+        return [vocab.unknown_message(row[position]) for position, vocab in self.vocabularies.items()
+                if vocab.code(row[position]) == UNKNOWN]
+
+    def category_error_rows(self, frame):
+        """{row number: messages} for the frame rows category_errors would reject."""
+        errors = {}
+        if not self.reject_unknown:
+            return errors
+        for position, vocab in self.vocabularies.items():
+            values = frame[self.columns[position]].to_numpy()
+            for i in np.flatnonzero(vocab.encode(values) == UNKNOWN):
+                errors.setdefault(int(i), []).append(vocab.unknown_message(values[i]))
+        return errors
+
+    def _canonical(self, frame):
+        # DataFrame path: replace other spellings, aliases and fallbacks with the encoder's categories
+        rewriting = {position: vocab for position, vocab in self.vocabularies.items() if vocab.rewrites}
+        if not rewriting:
+            return frame
+        frame = frame.copy()
+        for position, vocab in rewriting.items():
+            column = self.columns[position]
+            values = frame[column].to_numpy(dtype=object)
+            codes = vocab.encode(values)
+            known = codes != UNKNOWN
+            categories = np.asarray(vocab.categories, dtype=object)
+            frame[column] = np.where(known, categories[np.where(known, codes, 0)], values)
+        return frame
+
+    def _fast_for(self, n_rows):
+        # The compiled evaluator, or the native model's fast path for bulk calls when enabled
+        if self._load_model is None or n_rows <= self.compiled_max_rows:
+            return self.fast
+        if self._bulk is None:
+            with self._bulk_lock:
+                if self._bulk is None:
+                    if self.model is None:
+                        self.model = self._load_model()
+                    # Stays on the compiled evaluator if the native model has no fast path
+                    self._bulk = compile_model(self.model, self.columns, self.sample_row) or self.fast
+        return self._bulk
+
+    def _frame(self, rows):
+        # pandas is only imported once a DataFrame is needed
+        import pandas as pd
+
+        return pd.DataFrame(rows, columns=self.columns)
+
+    def predict_rows(self, rows):
+        """rows: value sequences in column order."""
+        if self.fast is not None:
+            return self._fast_for(len(rows)).predict_rows(rows)
+        return self.model.predict(self._canonical(self._frame(rows)))
+
+    def predict_frame(self, frame):
+        """frame: DataFrame with the model's columns, in column order."""
+        if self.fast is not None:
+            return self._fast_for(len(frame)).predict_columns([frame[column].to_numpy() for column in self.columns])
+        return self.model.predict(self._canonical(frame))
+
+    def predict_proba_rows(self, rows):
+        """Class probabilities, one column per entry of classes."""
+        if self.fast is not None:
+            return self._fast_for(len(rows)).predict_proba_rows(rows)
+        return self.model.predict_proba(self._canonical(self._frame(rows)))
+
+    def predict_proba_frame(self, frame):
+        if self.fast is not None:
+            return self._fast_for(len(frame)).predict_proba_columns([frame[column].to_numpy() for column in self.columns])
+        return self.model.predict_proba(self._canonical(frame))
+
+    def warmup(self):
+        """
+        Run synthetic single-row and batch predictions so neither the first real
+        request nor the first batch pays for lazy imports and first-call setup.
+        The optional native model behind a compiled one is not loaded here.
+        """
+        batch_rows = 2 if self._load_model is None else min(2, self.compiled_max_rows)
+        self.predict_frame(self._frame([self.sample_row] * batch_rows))
+        if self.class_names is not None:
+            self.predict_proba_rows([self.sample_row])
+        return self.predict_rows([self.sample_row])
@@ -0,0 +1,342 @@
+# backend/core/lookup.py
+"""
+Precomputed prediction tables for hot regions of the input space.
+
+Build (offline, once per model release):
+    python -m backend.core.lookup [--regions regions.json] [--max-cells N] [crop fertilizer irrigation ...]
+
+A region is a grid: one list of values per model input, given in the regions
+file as a list or as {"start": a, "stop": b, "step": s}. Every cell of every
+region is scored with the served predictor and written next to the model file
+as a flat .lookup.npy (memory-mapped when loaded, so forked workers share it)
+with a .lookup.json header holding the axes, the model version (hash of the
+model file) and the build time. The build refuses to write a table that
+disagrees with predict_rows on a sample of its cells.
+
+The services look a validated row up before touching the model: a row whose
+every value is on a region's axes is one dict lookup per input plus one array
+read. Rows outside the regions, and requests served by any other model version
+(retrained file, A/B candidate), fall through to the model.
+
+Without a regions file each model gets the dashboard's (app.py) slider sweeps:
+every dropdown combination with one slider moved over its range and the others
+at their defaults.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+from backend.core.config import (
+    INPUT_LIMITS, CATEGORY_FALLBACKS, LOOKUP_ENABLED, LOOKUP_REGIONS_FILE, LOOKUP_MAX_CELLS,
+    REGIONS, SOIL_TYPES, SEASONS, F_SOIL_TYPES, F_CROP_TYPES
+)
+from backend.core.metrics import register_stats
+
+# Rows scored per predict_frame call while building
+BUILD_CHUNK_ROWS = 65536
+
+# Cells compared against predict_rows before a table is written
+PARITY_SAMPLE = 2000
+
+def table_path(model_path):
+    return os.path.splitext(model_path)[0] + ".lookup.npy"
+
+def header_path(model_path):
+    return os.path.splitext(model_path)[0] + ".lookup.json"
+
+def _key(value):
+    # Numbers are matched as floats (so 10 and 10.0 hit the same cell), strings exactly
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+class LookupTable:
+    """
+    Predictions of one model version for every cell of a list of regions,
+    stored flat (each region in C order after the previous one).
+    """
+
+    def __init__(self, name, values, header):
+        self.name = name
+        self.values = values
+        self.version = header["model_version"]
+        self.header = header
+        self.size_bytes = values.nbytes
+        self.hits = self.misses = self.stale = 0
+        self._regions = []
+        for region in header["regions"]:
+            shape = [len(axis) for axis in region["axes"]]
+            strides = [int(np.prod(shape[j + 1:])) for j in range(len(shape))]
+            axes = [({_key(value): i for i, value in enumerate(axis)}, stride)
+                    for axis, stride in zip(region["axes"], strides)]
+            self._regions.append((region["offset"], axes))
+
+    def get(self, row, version):
+        """
+        Return (True, prediction) when row (values in model column order) is a
+        cell of a region and version is the model version the table was built
+        from, (False, None) otherwise.
+        """
+        if version != self.version:
+            self.stale += 1
+            return False, None
+        key = [_key(value) for value in row]
+        for offset, axes in self._regions:
+            index = offset
+            for value, (positions, stride) in zip(key, axes):
+                position = positions.get(value)
+                if position is None:
+                    break
+                index += position * stride
+            else:
+                self.hits += 1
+                return True, self.values[index]
+        self.misses += 1
+        return False, None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "regions": len(self._regions),
+            "cells": len(self.values),
+            "size_bytes": self.size_bytes,
+            "build_seconds": self.header["build_seconds"],
+            "built_at": self.header["built_at"],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stale": self.stale
+        }
+
+def load_lookup(name, model_path, fallbacks=CATEGORY_FALLBACKS):
+    """
+    The table built for model_path, memory-mapped, or None when it is missing,
+    unreadable or was built with other category fallbacks than fallbacks.
+    """
+    path, header_file = table_path(model_path), header_path(model_path)
+    if not (os.path.exists(path) and os.path.exists(header_file)):
+        return None
+    with open(header_file) as f:
+        header = json.load(f)
+    used = {column: fallbacks.get(column) for column in header["columns"] if fallbacks.get(column)}
+    if used != header["fallbacks"]:
+        print(f"Ignoring {name} lookup table: built with category fallbacks {header['fallbacks']}", file=sys.stderr)
+        return None
+    values = np.load(path, mmap_mode="r", allow_pickle=False)
+    if values.shape != (header["cells"],):
+        print(f"Ignoring {name} lookup table: {path} does not match its header", file=sys.stderr)
+        return None
+    return LookupTable(name, values, header)
+
+def lookup_table(name, model_path):
+    """Load the table for a service model and report its stats, or None when disabled or not built."""
+    if not LOOKUP_ENABLED:
+        return None
+    try:
+        table = load_lookup(name, model_path)
+    except Exception as e:
+        print(f"Ignoring {name} lookup table: {e}", file=sys.stderr)
+        return None
+    if table is not None:
+        register_stats(f"lookup.{name}", table.stats)
+    return table
+
+def axis_values(spec, limit_key=None):
+    """Values of one region axis from a list or {"start", "stop", "step"}, checked against INPUT_LIMITS."""
+    if isinstance(spec, dict):
+        start, stop, step = float(spec["start"]), float(spec["stop"]), float(spec.get("step", 1))
+        if step <= 0 or stop < start:
+            raise ValueError(f"Bad range {spec}")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        values = np.round(start + step * np.arange(count), 6).tolist()
+    else:
+        values = list(spec)
+    if not values:
+        raise ValueError("Empty axis")
+    if limit_key is None:
+        if not all(isinstance(value, str) for value in values):
+            raise ValueError(f"Categorical axis values must be strings: {values}")
+        return list(dict.fromkeys(values))
+    low, high = INPUT_LIMITS[limit_key]
+    values = [float(value) for value in values]
+    outside = [value for value in values if not low <= value <= high]
+    if outside:
+        raise ValueError(f"Values {outside[:5]} are outside {INPUT_LIMITS[limit_key]}")
+    return list(dict.fromkeys(values))
+
+def _slider_axis(limit_key, step=1):
+    low, high = INPUT_LIMITS[limit_key]
+    return {"start": low, "stop": high, "step": step}
+
+def _slider_sweeps(defaults, sliders, dropdowns):
+    """One region per slider: that slider over its range, the others at defaults, all dropdown values."""
+    return [
+        {**{field: [value] for field, value in defaults.items()}, **dropdowns, field: axis}
+        for field, axis in sliders.items()
+    ]
+
+def dashboard_regions():
+    """Default regions: the slider sweeps reachable from the dashboard's starting position."""
+    return {
+        "crop": _slider_sweeps(
+            {"N": 0, "P": 0, "K": 0, "ph": 6.5, "temperature": 25, "humidity": 50, "rainfall": 0},
+            {"N": _slider_axis("n"), "P": _slider_axis("p"), "K": _slider_axis("k"),
+             "ph": _slider_axis("ph", 0.01), "temperature": _slider_axis("temperature"),
+             "humidity": _slider_axis("humidity"), "rainfall": _slider_axis("rainfall")},
+            {}
+        ),
+        "fertilizer": _slider_sweeps(
+            {"Temparature": 25, "Humidity": 50, "Moisture": 30, "Nitrogen": 50, "Potassium": 20, "Phosphorous": 30},
+            {"Temparature": _slider_axis("temperature"), "Humidity": _slider_axis("humidity"),
+             "Moisture": _slider_axis("soil_moisture"), "Nitrogen": _slider_axis("n"),
+             "Potassium": _slider_axis("k"), "Phosphorous": _slider_axis("p")},
+            {"Soil_Type": F_SOIL_TYPES, "Crop_Type": F_CROP_TYPES}
+        ),
+        "irrigation": _slider_sweeps(
+            {"Farm_Area": 1.0, "Soil_pH": 6.5, "Nitrogen": 0, "Phosphorus": 0, "Potassium": 0,
+             "Soil_Moisture": 30, "Temperature": 25, "Rainfall": 0},
+            # Farm area moves in 0.01 acre steps on the dashboard; only tenths are tabulated
+            {"Farm_Area": _slider_axis("farm_area", 0.1), "Soil_pH": _slider_axis("ph", 0.01),
+             "Nitrogen": _slider_axis("n"), "Phosphorus": _slider_axis("p"), "Potassium": _slider_axis("k"),
+             "Soil_Moisture": _slider_axis("soil_moisture"), "Temperature": _slider_axis("temperature"),
+             "Rainfall": _slider_axis("rainfall")},
+            {"Region": REGIONS, "Crop_Type": F_CROP_TYPES, "Soil_Type": SOIL_TYPES, "Season": SEASONS}
+        )
+    }
+
+def _region_axes(fields, limit_keys, region):
+    unknown = set(region) - set(fields)
+    if unknown:
+        raise ValueError(f"Unknown inputs {sorted(unknown)} (expected {', '.join(fields)})")
+    missing = [field for field in fields if field not in region]
+    if missing:
+        raise ValueError(f"Missing inputs {missing}")
+    return [axis_values(region[field], limit_keys.get(field)) for field in fields]
+
+def _cells(axes, indexes):
+    # Column arrays (model column order) of the cells at flat indexes of one region
+    positions = np.unravel_index(indexes, [len(axis) for axis in axes])
+    return [np.asarray(axis, dtype=object if isinstance(axis[0], str) else float)[position]
+            for axis, position in zip(axes, positions)]
+
+def build_table(name, model, fields, limit_keys, regions, path, max_cells=LOOKUP_MAX_CELLS, fallbacks=CATEGORY_FALLBACKS):
+    """
+    Score every cell of regions with model (a registry ModelVersion) and write
+    the table to path (.npy) plus its header; returns the header.
+    fields are the service record keys in model column order and limit_keys
+    maps the numeric ones to INPUT_LIMITS keys.
+    """
+    import pandas as pd
+
+    started = time.perf_counter()
+    predictor = model.predictor
+    region_axes = [_region_axes(fields, limit_keys, region) for region in regions]
+    sizes = [int(np.prod([len(axis) for axis in axes])) for axes in region_axes]
+    total = sum(sizes)
+    if not total:
+        raise ValueError("No regions to tabulate")
+    if total > max_cells:
+        raise ValueError(f"{total} cells exceed the limit of {max_cells} (GROWWELL_LOOKUP_MAX_CELLS)")
+
+    values, offset, header_regions = None, 0, []
+    for axes, size in zip(region_axes, sizes):
+        for start in range(0, size, BUILD_CHUNK_ROWS):
+            indexes = np.arange(start, min(start + BUILD_CHUNK_ROWS, size))
+            frame = pd.DataFrame(dict(zip(predictor.columns, _cells(axes, indexes))))
+            predictions = np.asarray(predictor.predict_frame(frame))
+            if values is None:
+                if predictions.dtype.kind not in "iubf":
+                    raise ValueError(f"Predictions of dtype {predictions.dtype} can't be tabulated")
+                values = np.lib.format.open_memmap(path, mode="w+", dtype=predictions.dtype, shape=(total,))
+            values[offset + start: offset + start + len(indexes)] = predictions
+        header_regions.append({"offset": offset, "axes": axes})
+        offset += size
+    values.flush()
+
+    # Spot-check cells against the single-row path the services use
+    rng = np.random.default_rng(0)
+    sample = np.sort(rng.choice(total, min(PARITY_SAMPLE, total), replace=False))
+    rows = []
+    for index in sample:
+        region = int(np.searchsorted([r["offset"] for r in header_regions], index, side="right")) - 1
+        columns = _cells(region_axes[region], np.array([index - header_regions[region]["offset"]]))
+        rows.append(tuple(column[0] for column in columns))
+    expected = np.asarray(predictor.predict_rows(rows))
+    if not np.allclose(values[sample].astype(float), expected.astype(float), rtol=1e-6, atol=1e-6):
+        raise ValueError("Table disagrees with predict_rows")
+    del values
+
+    return {
+        "model": name,
+        "model_version": model.id,
+        "columns": list(predictor.columns),
+        "fields": list(fields),
+        "fallbacks": {column: fallbacks.get(column) for column in predictor.columns if fallbacks.get(column)},
+        "cells": total,
+        "regions": header_regions,
+        "build_seconds": round(time.perf_counter() - started, 3),
+        "built_at": time.time()
+    }
+
+def _service_specs():
+    # Record keys in model column order and INPUT_LIMITS keys of the numeric ones, from the services
+    from backend.services.crop_service import CROP_FIELDS
+    from backend.services.fertilizer_service import FERTILIZER_COLUMNS, FERTILIZER_NUMERIC_FIELDS
+    from backend.services.irrigation_service import IRRIGATION_COLUMNS, IRRIGATION_NUMERIC_FIELDS
+
+    return {
+        "crop": (list(CROP_FIELDS), CROP_FIELDS),
+        "fertilizer": (list(FERTILIZER_COLUMNS), FERTILIZER_NUMERIC_FIELDS),
+        "irrigation": (list(IRRIGATION_COLUMNS), IRRIGATION_NUMERIC_FIELDS),
+    }
+
+def main(argv=None):
+    from backend.core.config import MODEL_PATHS
+    from backend.core.registry import registry, ModelUnavailable
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("models", nargs="*", help="models to tabulate (default: all)")
+    parser.add_argument("--regions", default=LOOKUP_REGIONS_FILE, help="JSON file of regions per model")
+    parser.add_argument("--max-cells", type=int, default=LOOKUP_MAX_CELLS)
+    args = parser.parse_args(argv)
+
+    specs = _service_specs()
+    regions = dashboard_regions()
+    if args.regions:
+        with open(args.regions) as f:
+            regions.update(json.load(f))
+    failed = False
+    for name in args.models or list(specs):
+        fields, limit_keys = specs[name]
+        source = MODEL_PATHS[name]
+        try:
+            model = registry.get(name, allow_candidate=False)
+        except ModelUnavailable as e:
+            print(f"{name}: skipped, model unavailable ({e})")
+            continue
+        target = table_path(source)
+        staging = target[:-len(".npy")] + ".tmp.npy"
+        try:
+            header = build_table(name, model, fields, limit_keys, regions.get(name, []), staging, args.max_cells)
+        except ValueError as e:
+            if os.path.exists(staging):
+                os.remove(staging)
+            print(f"{name}: {e}, not written")
+            failed = True
+            continue
+        # The header goes last: a table is only used once both files describe the same build
+        os.replace(staging, target)
+        with open(header_path(source) + ".tmp", "w") as f:
+            json.dump(header, f)
+        os.replace(header_path(source) + ".tmp", header_path(source))
+        print(f"{name}: wrote {target} ({header['cells']} cells in {len(header['regions'])} regions, "
+              f"{os.path.getsize(target) / 2 ** 20:.1f} MiB, built in {header['build_seconds']:.1f}s "
+              f"for model version {header['model_version']})")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# backend/core/metrics.py
+
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Default bucket bounds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram (cumulative counts, Prometheus style)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative, running = {}, 0
+        for bound, c in zip(self.buckets + ("+Inf",), counts):
+            running += c
+            cumulative[str(bound)] = running
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "buckets": cumulative
+        }
+
+# name -> zero-argument callable returning a JSON-serializable dict
+_stats_sources = {}
+
+def register_stats(name, source):
+    _stats_sources[name] = source
+
+def collect_stats():
+    return {name: source() for name, source in _stats_sources.items()}
+
+# (endpoint, stage) -> Histogram of seconds; (endpoint, kind) -> error count
+_stages = {}
+_errors = Counter()
+_stages_lock = threading.Lock()
+
+def stage_histogram(endpoint, stage):
+    histogram = _stages.get((endpoint, stage))
+    if histogram is None:
+        with _stages_lock:
+            histogram = _stages.setdefault((endpoint, stage), Histogram())
+    return histogram
+
+def observe_stage(endpoint, stage, seconds):
+    stage_histogram(endpoint, stage).observe(seconds)
+
+@contextmanager
+def span(endpoint, stage):
+    """Time the enclosed block into the (endpoint, stage) histogram, also when it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_histogram(endpoint, stage).observe(time.perf_counter() - started)
+
+def count_error(endpoint, kind, n=1):
+    with _stages_lock:
+        _errors[(endpoint, kind)] += n
+
+def stage_stats():
+    with _stages_lock:
+        stages = dict(_stages)
+        errors = dict(_errors)
+    timings = {}
+    for (endpoint, stage), histogram in sorted(stages.items()):
+        timings.setdefault(endpoint, {})[stage] = histogram.snapshot()
+    counts = {}
+    for (endpoint, kind), count in sorted(errors.items()):
+        counts.setdefault(endpoint, {})[kind] = count
+    return {"seconds": timings, "errors": counts}
+
+register_stats("stages", stage_stats)
+
+def _metric_name(*parts):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join(str(part) for part in parts if part != ""))
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+def _is_histogram(value):
+    return isinstance(value, dict) and {"count", "sum", "buckets"} <= value.keys()
+
+def _render_histogram(lines, name, labels, snapshot):
+    for bound, count in snapshot["buckets"].items():
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {count}")
+    lines.append(f"{name}_sum{_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+
+def _flatten(samples, path, labels, value):
+    if _is_histogram(value):
+        samples.setdefault(_metric_name(*path), ("histogram", []))[1].append((labels, value))
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(samples, path + (key,), labels, item)
+    elif isinstance(value, (bool, int, float)):
+        samples.setdefault(_metric_name(*path), ("gauge", []))[1].append((labels, float(value)))
+
+def render_prometheus():
+    """
+    Everything in collect_stats() in the Prometheus text format.
+
+    Stage timings and error counts become growwell_stage_seconds{endpoint,stage}
+    and growwell_errors_total{endpoint,kind}. Other sources are flattened:
+    nested keys join into the metric name, a source named "kind.name" adds a
+    name label, histograms stay histograms, other numbers become gauges and
+    strings are left out.
+    """
+    lines = []
+    with _stages_lock:
+        stages = sorted(_stages.items())
+        errors = sorted(_errors.items())
+    lines.append("# TYPE growwell_stage_seconds histogram")
+    for (endpoint, stage), histogram in stages:
+        _render_histogram(lines, "growwell_stage_seconds", {"endpoint": endpoint, "stage": stage}, histogram.snapshot())
+    lines.append("# TYPE growwell_errors_total counter")
+    for (endpoint, kind), count in errors:
+        lines.append(f"growwell_errors_total{_labels({'endpoint': endpoint, 'kind': kind})} {count}")
+
+    samples = {}
+    for source_name, source in list(_stats_sources.items()):
+        if source_name == "stages":
+            continue
+        kind, _, name = source_name.partition(".")
+        _flatten(samples, ("growwell", kind), {"name": name} if name else {}, source())
+    for name, (metric_type, series) in samples.items():
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in series:
+            if metric_type == "histogram":
+                _render_histogram(lines, name, labels, value)
+            else:
+                lines.append(f"{name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,105 @@
+# backend/core/microbatch.py
+
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from backend.core.config import MICROBATCH_WINDOW_MS, MICROBATCH_MAX_SIZE
+from backend.core.metrics import Histogram, SIZE_BUCKETS, register_stats
+
+class MicroBatcher:
+    """
+    Collects concurrent single-row predictions for one model and runs them as a
+    single batched predict.
+
+    predict_batch receives a list of rows (value tuples in the service's model
+    column order, as passed to predict_rows) and must return one prediction per
+    row, in order. A batch is flushed when it reaches max_batch_size or
+    window_ms after its first row arrived.
+
+    max_callers, when given, returns the most threads that can be blocked in
+    submit() at once (e.g. the inference pool size). A batch holding that many
+    rows is flushed straight away, as no other row can arrive until one of
+    them is answered.
+    """
+
+    def __init__(self, name, predict_batch, window_ms=MICROBATCH_WINDOW_MS,
+                 max_batch_size=MICROBATCH_MAX_SIZE, max_callers=None):
+        self.name = name
+        self.predict_batch = predict_batch
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_callers = max_callers
+        self.batch_size = Histogram(SIZE_BUCKETS)
+        self.queue_wait = Histogram()
+        self.predict_time = Histogram()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        register_stats(f"microbatch.{name}", self.stats)
+
+    def submit(self, row):
+        """Queue one row and block until its prediction is ready."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((row, future, time.perf_counter()))
+        return future.result()
+
+    def _batch_limit(self):
+        if self.max_callers is None:
+            return self.max_batch_size
+        return max(1, min(self.max_batch_size, self.max_callers()))
+
+    def stats(self):
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batch_limit": self._batch_limit(),
+            "queue_depth": self._queue.qsize(),
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "predict_seconds": self.predict_time.snapshot()
+        }
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name=f"microbatch-{self.name}", daemon=True)
+                    self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        limit = self._batch_limit()
+        deadline = time.perf_counter() + self.window
+        while len(batch) < limit:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                self.queue_wait.observe(started - queued_at)
+            self.batch_size.observe(len(batch))
+
+            try:
+                predictions = self.predict_batch([row for row, _, _ in batch])
+            except Exception as e:
+                traceback.print_exc()
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                self.predict_time.observe(time.perf_counter() - started)
+
+            for (_, future, _), prediction in zip(batch, predictions):
+                future.set_result(prediction)
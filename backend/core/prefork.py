@@ -0,0 +1,124 @@
+# backend/core/prefork.py
+"""
+Preforking HTTP server for main:app: models are loaded once and shared by all workers.
+
+    python -m backend.core.prefork --workers 4 --inference-workers 2 --port 8000
+
+The parent process imports main.py, runs the startup warm-up (every model
+loaded and exercised once, pandas imported), moves everything created so far
+out of the garbage collector's reach (gc.freeze) and binds the listening
+socket. It then forks --workers uvicorn workers that serve from the inherited
+socket. Models, modules and other objects created before the fork are shared
+copy-on-write between the workers, where `uvicorn main:app --workers N` would
+load everything once per worker.
+
+--workers (GROWWELL_SERVER_WORKERS) sets the number of HTTP workers;
+--inference-workers (GROWWELL_EXECUTOR_WORKERS) sets each worker's inference
+pool size. A worker that exits is replaced. SIGINT / SIGTERM stop them all.
+Model hot reload still works but is per worker: a reloaded model is no longer
+shared. See benchmarks/serving.py for the memory / throughput comparison.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from backend.core.config import SERVER_WORKERS, INFERENCE_WORKERS, WARMUP_MODELS
+
+def _bind(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def _serve_worker(app, sock, log_level):
+    import uvicorn
+
+    # The parent's handlers stop the whole server; uvicorn installs its own
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+
+def serve(host="0.0.0.0", port=8000, workers=SERVER_WORKERS, inference_workers=INFERENCE_WORKERS,
+          log_level="info"):
+    # Imported before forking so the workers share these modules too
+    import uvicorn  # noqa: F401
+    import main
+    from backend.core.executor import inference
+    from backend.core.registry import registry
+    from backend.core.startup import startup
+
+    inference.configure(inference_workers)
+    # Synchronous, so no helper threads are running when the workers are forked
+    startup.warm_up(registry, WARMUP_MODELS)
+    gc.collect()
+    gc.freeze()
+
+    sock = _bind(host, port)
+    print(f"Serving main:app on {host}:{port} with {workers} workers "
+          f"({inference_workers} inference workers each)", file=sys.stderr)
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _serve_worker(main.app, sock, log_level)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited ({os.waitstatus_to_exitcode(status)}); starting a new one", file=sys.stderr)
+            # Don't spin if workers die straight away
+            time.sleep(1)
+            spawn()
+    sock.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="HTTP worker processes")
+    parser.add_argument("--inference-workers", type=int, default=INFERENCE_WORKERS,
+                        help="inference pool size per worker")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    serve(args.host, args.port, args.workers, args.inference_workers, args.log_level)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
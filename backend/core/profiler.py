@@ -0,0 +1,131 @@
+# backend/core/profiler.py
+
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from backend.core.config import PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS, PROFILER_OUTPUT_DIR
+from backend.core.metrics import register_stats
+
+class SamplingProfiler:
+    """
+    In-process statistical profiler.
+
+    While running, a daemon thread snapshots the Python stack of every other
+    thread every interval_ms and counts identical stacks. folded() returns them
+    in the collapsed "frame;frame;frame count" format read by flamegraph.pl and
+    speedscope. It only sees the process it runs in, so under several uvicorn
+    workers it profiles one worker; it stops by itself after max_seconds.
+    """
+
+    def __init__(self, interval_ms=PROFILER_INTERVAL_MS, max_seconds=PROFILER_MAX_SECONDS):
+        self.interval = interval_ms / 1000.0
+        self.max_seconds = max_seconds
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._stacks = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds=None, interval_ms=None, save=False):
+        """
+        Start a fresh profile (previous samples are dropped); returns False if
+        one is running. With save, the profile is written to a file when it ends.
+        """
+        with self._lock:
+            if self.running:
+                return False
+            if interval_ms:
+                self.interval = interval_ms / 1000.0
+            duration = min(seconds or self.max_seconds, self.max_seconds)
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at, self.stopped_at = time.time(), None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(duration, save), name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def folded(self):
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def save(self, directory=PROFILER_OUTPUT_DIR):
+        """Write folded() to a per-process file and return its path."""
+        path = os.path.join(directory, f"growwell-profile-{os.getpid()}-{int(self.started_at or time.time())}.folded")
+        with open(path, "w") as f:
+            f.write(self.folded())
+        return path
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "running": self.running,
+            "interval_ms": self.interval * 1000.0,
+            "samples": self.samples,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at
+        }
+
+    def _run(self, duration, save):
+        own = threading.get_ident()
+        deadline = time.monotonic() + duration
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            sampled = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                sampled.append(";".join(reversed(frames)))
+            with self._lock:
+                self._stacks.update(sampled)
+                self.samples += 1
+        self.stopped_at = time.time()
+        if save:
+            print(f"Profile of worker {os.getpid()} written to {self.save()}", file=sys.stderr)
+
+profiler = SamplingProfiler()
+register_stats("profiler", profiler.stats)
+
+def install_signal_toggle(signum=signal.SIGUSR2):
+    """
+    kill -USR2 <worker pid> starts profiling that worker; the next USR2 (or
+    PROFILER_MAX_SECONDS) stops it and writes the folded stacks to
+    PROFILER_OUTPUT_DIR. Signals can only be hooked from the main thread;
+    returns False elsewhere (e.g. under a test client).
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+
+    def toggle(signum, frame):
+        try:
+            if profiler.running:
+                profiler._stop.set()
+            else:
+                profiler.start(save=True)
+                print(f"Profiling worker {os.getpid()}", file=sys.stderr)
+        except Exception:
+            traceback.print_exc()
+
+    signal.signal(signum, toggle)
+    return True
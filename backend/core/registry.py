@@ -0,0 +1,321 @@
+# backend/core/registry.py
+
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import Counter
+from backend.core.config import (
+    MODEL_PATHS, MODEL_MMAP, REGISTRY_RETRY_SECONDS, MODEL_RELOAD_POLL_SECONDS,
+    MODEL_CANDIDATE_PATHS, MODEL_CANDIDATE_PERCENT
+)
+from backend.core.metrics import Histogram, register_stats, observe_stage, count_error
+from backend.core.startup import startup
+
+# Buckets for regression outputs (irrigation m³)
+VALUE_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+class ModelUnavailable(RuntimeError):
+    """Raised when a model failed to load; only the endpoints using it are affected."""
+
+def current_rss():
+    """Resident set size of this process in bytes (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def load_pickle(path):
+    """
+    joblib.load, with GROWWELL_MODEL_MMAP memory-mapping the NumPy arrays
+    stored in the pickle read-only. Only models that keep using those arrays
+    share their pages between workers: XGBoost boosters are pickled as raw
+    bytes and always get a private copy (their compiled .npz is what gets
+    mapped, see backend.core.treecompile).
+    """
+    import joblib
+
+    return joblib.load(path, mmap_mode="r" if MODEL_MMAP else None)
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+def file_version(path):
+    """Short content hash used as the model version id."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+class ModelVersion:
+    """
+    One loaded version of a model. Wraps the service predictor and records
+    predict latency and the distribution of its predictions.
+    """
+
+    def __init__(self, name, role, path, predictor, version, signature, load_seconds, rss_delta_bytes):
+        self.name = name
+        self.role = role
+        self.path = path
+        self.predictor = predictor
+        self.class_names = getattr(predictor, "class_names", None)
+        self.id = version
+        self.signature = signature
+        self.load_seconds = load_seconds
+        self.rss_delta_bytes = rss_delta_bytes
+        self.loaded_at = time.time()
+        self.latency = Histogram()
+        self.labels = Counter()
+        self.values = Histogram(VALUE_BUCKETS)
+        self._lock = threading.Lock()
+
+    def predict_rows(self, rows):
+        started = time.perf_counter()
+        predictions = self.predictor.predict_rows(rows)
+        self._observe(time.perf_counter() - started, predictions)
+        return predictions
+
+    def predict_frame(self, frame):
+        started = time.perf_counter()
+        predictions = self.predictor.predict_frame(frame)
+        self._observe(time.perf_counter() - started, predictions)
+        return predictions
+
+    def canonical_category(self, column, value):
+        return self.predictor.canonical_category(column, value)
+
+    def category_errors(self, row):
+        return self.predictor.category_errors(row)
+
+    def category_error_rows(self, frame):
+        return self.predictor.category_error_rows(frame)
+
+    def predict_proba_rows(self, rows):
+        started = time.perf_counter()
+        probabilities = self.predictor.predict_proba_rows(rows)
+        self._observe(time.perf_counter() - started, self.predictor.classes[probabilities.argmax(axis=1)])
+        return probabilities
+
+    def predict_proba_frame(self, frame):
+        started = time.perf_counter()
+        probabilities = self.predictor.predict_proba_frame(frame)
+        self._observe(time.perf_counter() - started, self.predictor.classes[probabilities.argmax(axis=1)])
+        return probabilities
+
+    def _observe(self, seconds, predictions):
+        startup.first_prediction()
+        self.latency.observe(seconds)
+        kind = getattr(getattr(predictions, "dtype", None), "kind", "f")
+        if kind in "iub":
+            with self._lock:
+                self.labels.update(int(p) for p in predictions)
+        else:
+            for p in predictions:
+                self.values.observe(float(p))
+
+    def stats(self):
+        with self._lock:
+            labels = {str(label): count for label, count in sorted(self.labels.items())}
+        return {
+            "version": self.id,
+            "role": self.role,
+            "path": os.path.normpath(self.path),
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "rss_delta_bytes": self.rss_delta_bytes,
+            "predict_seconds": self.latency.snapshot(),
+            "predictions": labels if labels else self.values.snapshot()
+        }
+
+class _Slot:
+    """Current version served from one file (stable or candidate)."""
+
+    def __init__(self, role, path):
+        self.role = role
+        self.path = path
+        self.lock = threading.Lock()
+        self.version = None
+        self.error = None
+        self.failed_at = 0.0
+
+class _Entry:
+    def __init__(self, name, loader, path, candidate_path):
+        self.name = name
+        self.loader = loader
+        self.slots = {"stable": _Slot("stable", path)}
+        if candidate_path:
+            self.slots["candidate"] = _Slot("candidate", candidate_path)
+        self.retired = []
+        self.loads = 0
+
+class ModelRegistry:
+    """
+    Lazily loaded, hot-swappable models keyed on MODEL_PATHS names.
+
+    Each service registers a loader (path -> predictor with predict_rows,
+    predict_frame and warmup). The first get() runs it under a per-slot lock;
+    a failure is remembered and re-raised as ModelUnavailable for
+    REGISTRY_RETRY_SECONDS before the load is retried.
+
+    When the watcher is running, a changed file is loaded and warmed up in the
+    background and then swapped in with a single assignment. Requests already
+    holding the old version finish on it; it is freed once the last one drops
+    it ("draining" in status()). An optional candidate file per model receives
+    candidate_percent of get() calls.
+    """
+
+    def __init__(self, paths=MODEL_PATHS, candidate_paths=MODEL_CANDIDATE_PATHS,
+                 candidate_percent=MODEL_CANDIDATE_PERCENT, retry_seconds=REGISTRY_RETRY_SECONDS):
+        self.paths = paths
+        self.candidate_paths = candidate_paths
+        self.candidate_share = candidate_percent / 100.0
+        self.retry_seconds = retry_seconds
+        self._entries = {}
+        self._served = threading.local()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def register(self, name, loader):
+        self._entries[name] = _Entry(name, loader, self.paths[name], self.candidate_paths.get(name))
+        register_stats(f"model.{name}", lambda: self.entry_status(name))
+
+    def get(self, name, allow_candidate=True):
+        """
+        Version to serve this call: the candidate for a candidate_percent share
+        of calls (when one is configured and loads), otherwise the stable one.
+        """
+        entry = self._entries[name]
+        version = None
+        candidate = entry.slots.get("candidate")
+        if allow_candidate and candidate is not None and random.random() < self.candidate_share:
+            try:
+                version = self._slot_version(entry, candidate)
+            except ModelUnavailable:
+                version = None
+        if version is None:
+            version = self._slot_version(entry, entry.slots["stable"])
+        setattr(self._served, name, version.id)
+        return version
+
+    def served_version(self, name):
+        """Version id of the last get(name) made by this thread."""
+        return getattr(self._served, name, None)
+
+    def version_headers(self, name):
+        """
+        Response headers naming the model version this thread just served
+        (consumed, so a later request that never reaches the model gets none).
+        """
+        version = self.served_version(name)
+        setattr(self._served, name, None)
+        return {"X-Model-Version": f"{name}={version}"} if version else {}
+
+    def names(self):
+        return list(self._entries)
+
+    def is_loaded(self, name):
+        return self._entries[name].slots["stable"].version is not None
+
+    def reload(self, name, role="stable"):
+        """Load, warm up and atomically swap in the current file of a slot."""
+        entry = self._entries[name]
+        slot = entry.slots[role]
+        with slot.lock:
+            old = slot.version
+            self._load(entry, slot)
+            if old is not None:
+                entry.retired.append(weakref.ref(old))
+
+    def start_watcher(self, poll_seconds=MODEL_RELOAD_POLL_SECONDS):
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(poll_seconds,), name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        self._watcher = None
+
+    def status(self):
+        return {name: self.entry_status(name) for name in self._entries}
+
+    def entry_status(self, name):
+        entry = self._entries[name]
+        stable = entry.slots["stable"]
+        draining = [version.id for version in (ref() for ref in entry.retired) if version is not None]
+        entry.retired = [ref for ref in entry.retired if ref() is not None]
+        return {
+            "path": os.path.normpath(stable.path),
+            "loaded": stable.version is not None,
+            "error": stable.error,
+            "loads": entry.loads,
+            "versions": {
+                role: slot.version.stats() if slot.version is not None else {"error": slot.error}
+                for role, slot in entry.slots.items()
+            },
+            "draining": draining
+        }
+
+    def _slot_version(self, entry, slot):
+        version = slot.version
+        if version is not None:
+            return version
+        with slot.lock:
+            if slot.version is not None:
+                return slot.version
+            if slot.error is not None and time.monotonic() - slot.failed_at < self.retry_seconds:
+                raise ModelUnavailable(slot.error)
+            self._load(entry, slot)
+            return slot.version
+
+    def _load(self, entry, slot):
+        rss_before = current_rss()
+        started = time.perf_counter()
+        try:
+            signature = file_signature(slot.path)
+            version_id = file_version(slot.path)
+            predictor = entry.loader(slot.path)
+            predictor.warmup()
+        except Exception as e:
+            slot.error = f"Failed to load {entry.name} model: {str(e)}"
+            slot.failed_at = time.monotonic()
+            count_error(f"model.{entry.name}", "load_failed")
+            raise ModelUnavailable(slot.error) from e
+        load_seconds = time.perf_counter() - started
+        observe_stage(f"model.{entry.name}", "load", load_seconds)
+        rss_after = current_rss()
+        rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        slot.error = None
+        entry.loads += 1
+        slot.version = ModelVersion(entry.name, slot.role, slot.path, predictor, version_id,
+                                    signature, load_seconds, rss_delta)
+
+    def _watch(self, poll_seconds):
+        while not self._stop.wait(poll_seconds):
+            for name, entry in self._entries.items():
+                for role, slot in entry.slots.items():
+                    version = slot.version
+                    # Unloaded models pick up the current file on first use anyway
+                    if version is None or file_signature(slot.path) in (None, version.signature):
+                        continue
+                    try:
+                        self.reload(name, role)
+                        print(f"Reloaded {name} {role} model: {version.id} -> {slot.version.id}", file=sys.stderr)
+                    except ModelUnavailable:
+                        traceback.print_exc()
+                        # Keep serving the old version; try again on the next change
+                        slot.error = None
+                        version.signature = file_signature(slot.path)
+
+registry = ModelRegistry()
@@ -0,0 +1,80 @@
+# backend/core/startup.py
+
+import os
+import sys
+import threading
+import time
+from backend.core.metrics import register_stats
+
+def process_age():
+    """Seconds since this process was started (Linux), or None."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime, in clock ticks after boot), counted after the ")" closing the command name
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class Startup:
+    """
+    Cold-start milestones of this process, in seconds since it started:
+    "import" (main.py imported), "warmup" (models loaded and each run once on
+    synthetic input) and "first_prediction" (first model call for a request).
+    Where the process start time can't be read, seconds count from this
+    module's import instead.
+    """
+
+    def __init__(self):
+        age = process_age()
+        self.origin = time.perf_counter() - (age or 0.0)
+        self.marks = {}
+        self.models = {}
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def mark(self, milestone):
+        """Record milestone once; later calls are ignored."""
+        if milestone not in self.marks:
+            with self._lock:
+                self.marks.setdefault(milestone, round(time.perf_counter() - self.origin, 4))
+
+    def first_prediction(self):
+        if "first_prediction" not in self.marks:
+            self.mark("first_prediction")
+
+    def warm_up(self, registry, names=None):
+        """
+        Load each model (names, default all registered) and run its synthetic
+        prediction, recording per-model seconds or the load error; then mark
+        "warmup" and set ready.
+        """
+        for name in names or registry.names():
+            started = time.perf_counter()
+            try:
+                registry.get(name, allow_candidate=False)
+                self.models[name] = {"seconds": round(time.perf_counter() - started, 4)}
+            except Exception as e:
+                self.models[name] = {"seconds": round(time.perf_counter() - started, 4), "error": str(e)}
+        self.mark("warmup")
+        self.ready.set()
+        print(f"Warm-up done {self.marks['warmup']:.2f}s after process start: "
+              + ", ".join(f"{name} {model['seconds']:.2f}s" + (" (failed)" if "error" in model else "")
+                          for name, model in self.models.items()), file=sys.stderr)
+
+    def start_warm_up(self, registry, names=None):
+        """Run warm_up in a background thread so health checks are answered meanwhile."""
+        thread = threading.Thread(target=self.warm_up, args=(registry, names), name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "ready": self.ready.is_set(),
+            "seconds": dict(self.marks),
+            "models": dict(self.models)
+        }
+
+startup = Startup()
+register_stats("startup", startup.stats)
@@ -0,0 +1,204 @@
+# backend/core/stream.py
+"""
+Streaming bulk scoring of JSONL / CSV files in constant memory.
+
+    python -m backend.core.stream irrigation survey.jsonl scored.jsonl
+    python -m backend.core.stream crop survey.csv scored.csv --workers 4 --checkpoint scored.ckpt
+
+Records are read incrementally, validated against the model's pydantic schema
+and INPUT_LIMITS, scored in chunks of --chunk-size through the batch service
+functions and written out in input order as they complete. Each output row
+holds the record's index and either its prediction or its error. With
+--workers > 1 chunks are scored in a process pool with a bounded number in
+flight. With --checkpoint, progress is recorded after every chunk; rerunning
+the same command resumes after the last completed chunk.
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from backend.core.config import BATCH_CHUNK_SIZE
+
+CSV_COLUMNS = ["index", "prediction", "error", "details"]
+
+def file_format(path, default="jsonl"):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return default
+
+def read_raw(lines, fmt):
+    """
+    Split a text stream into unparsed records: (header, iterator). JSONL gives
+    one string per non-blank line and no header; CSV gives one list of cells per
+    row after the header row. Parsing is left to parse_records so it can run in
+    the scoring workers.
+    """
+    if fmt == "csv":
+        rows = csv.reader(lines)
+        return next(rows, []), rows
+    return None, (line for line in lines if line.strip())
+
+def parse_records(raw, fmt, header=None):
+    """Turn read_raw items into record dicts; malformed JSON lines become InvalidRecord."""
+    from backend.services.scoring_service import InvalidRecord
+
+    records = []
+    if fmt == "csv":
+        for cells in raw:
+            # Empty cells count as missing fields
+            records.append({key: value for key, value in zip(header, cells) if value != ""})
+        return records
+    for line in raw:
+        try:
+            records.append(json.loads(line))
+        except ValueError as e:
+            records.append(InvalidRecord(f"Invalid JSON: {e}"))
+    return records
+
+def score_raw(model_name, start, raw, fmt, header=None):
+    """Parse and score one chunk of read_raw items; returns the output rows."""
+    from backend.services.scoring_service import score_chunk
+
+    return score_chunk(model_name, start, parse_records(raw, fmt, header))
+
+def chunked(records, chunk_size, skip=0):
+    """Yield (start index, list of records) chunks, skipping the first `skip` records."""
+    records = iter(records)
+    for _ in itertools.islice(records, skip):
+        pass
+    start = skip
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+def format_header(fmt):
+    if fmt != "csv":
+        return ""
+    return ",".join(CSV_COLUMNS) + "\r\n"
+
+def format_rows(rows, fmt):
+    if fmt != "csv":
+        return "".join(json.dumps(row) + "\n" for row in rows)
+    lines = []
+    for row in rows:
+        details = row.get("details")
+        if isinstance(details, list):
+            details = "; ".join(str(detail) for detail in details)
+        lines.append({**row, "details": details})
+    out = io.StringIO()
+    csv.DictWriter(out, CSV_COLUMNS, extrasaction="ignore").writerows(lines)
+    return out.getvalue()
+
+def score_stream(model_name, lines, fmt, chunk_size=BATCH_CHUNK_SIZE, workers=1, skip=0):
+    """
+    Score the records of a JSONL / CSV text stream. Yields (records consumed so
+    far, output rows) per chunk, in input order. At most 2 * workers chunks are
+    held in memory at once.
+    """
+    header, raw = read_raw(lines, fmt)
+    chunks = chunked(raw, chunk_size, skip)
+    if workers <= 1:
+        for start, chunk in chunks:
+            yield start + len(chunk), score_raw(model_name, start, chunk, fmt, header)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for start, chunk in chunks:
+            pending.append((start + len(chunk), pool.submit(score_raw, model_name, start, chunk, fmt, header)))
+            if len(pending) >= 2 * workers:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+def _input_signature(path):
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+def _load_checkpoint(path, model_name, input_path, output_path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("model") != model_name or checkpoint.get("input") != _input_signature(input_path):
+        raise SystemExit(f"Checkpoint {path} belongs to a different model or input file")
+    if not os.path.exists(output_path) or os.path.getsize(output_path) < checkpoint["output_bytes"]:
+        raise SystemExit(f"Output {output_path} is shorter than checkpoint {path} records")
+    return checkpoint
+
+def _save_checkpoint(path, checkpoint):
+    staging = path + ".tmp"
+    with open(staging, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(staging, path)
+
+def score_file(model_name, input_path, output_path, chunk_size=BATCH_CHUNK_SIZE, workers=1,
+               checkpoint_path=None, log=sys.stderr):
+    """Score input_path into output_path; returns the number of records written."""
+    in_fmt, out_fmt = file_format(input_path), file_format(output_path)
+    checkpoint = _load_checkpoint(checkpoint_path, model_name, input_path, output_path)
+    skip = checkpoint["records"] if checkpoint else 0
+
+    started = time.perf_counter()
+    with open(input_path, newline="", encoding="utf-8") as source, \
+            open(output_path, "a" if checkpoint else "w", newline="", encoding="utf-8") as out:
+        if checkpoint:
+            # Drop anything written after the last checkpoint
+            out.truncate(checkpoint["output_bytes"])
+            print(f"Resuming after {skip} records", file=log)
+        else:
+            out.write(format_header(out_fmt))
+
+        done, reported = skip, started
+        for done, rows in score_stream(model_name, source, in_fmt, chunk_size, workers, skip):
+            out.write(format_rows(rows, out_fmt))
+            if checkpoint_path:
+                out.flush()
+                _save_checkpoint(checkpoint_path, {
+                    "model": model_name,
+                    "input": _input_signature(input_path),
+                    "records": done,
+                    "output_bytes": os.fstat(out.fileno()).st_size
+                })
+            now = time.perf_counter()
+            if now - reported >= 1.0:
+                reported = now
+                print(f"{done} records ({(done - skip) / (now - started):.0f}/s)", file=log)
+
+    print(f"{done} records done in {time.perf_counter() - started:.1f}s", file=log)
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return done
+
+def main(argv=None):
+    from backend.services.scoring_service import SCORERS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", choices=sorted(SCORERS))
+    parser.add_argument("input", help=".jsonl or .csv file")
+    parser.add_argument("output", help=".jsonl or .csv file")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes (default 1)")
+    parser.add_argument("--checkpoint", help="progress file for resuming interrupted runs")
+    args = parser.parse_args(argv)
+
+    score_file(args.model, args.input, args.output, args.chunk_size, args.workers, args.checkpoint)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# backend/core/tracing.py
+
+import asyncio
+import contextvars
+import functools
+import time
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from backend.core.metrics import observe_stage, count_error
+
+# Handler start/end times of the request being served (set by TimedRoute)
+_marks = contextvars.ContextVar("growwell_handler_marks", default=None)
+
+def _mark(marks):
+    if marks is not None:
+        marks.append(time.perf_counter())
+
+def _mark_handler(endpoint):
+    # Record when the endpoint function starts and returns, i.e. after request
+    # parsing / pydantic validation and before response serialization
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            marks = _marks.get()
+            _mark(marks)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark(marks)
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            marks = _marks.get()
+            _mark(marks)
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark(marks)
+    return timed
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that times each request in stages under the route path:
+    "parse" (body read and pydantic validation), "handler" (the endpoint
+    function), "serialize" (response encoding) and "total". 4xx/5xx responses
+    are counted as errors keyed by status code.
+
+    Use as APIRouter(route_class=TimedRoute).
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _mark_handler(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        label = self.path
+
+        async def timed_handler(request):
+            marks = []
+            token = _marks.set(marks)
+            started = time.perf_counter()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            except RequestValidationError:
+                status = 422
+                raise
+            finally:
+                finished = time.perf_counter()
+                _marks.reset(token)
+                if len(marks) == 2:
+                    observe_stage(label, "parse", marks[0] - started)
+                    observe_stage(label, "handler", marks[1] - marks[0])
+                    observe_stage(label, "serialize", finished - marks[1])
+                observe_stage(label, "total", finished - started)
+                if status >= 400:
+                    count_error(label, str(status))
+
+        return timed_handler
@@ -0,0 +1,403 @@
+# backend/core/treecompile.py
+"""
+Compile XGBoost tree ensembles into flat NumPy arrays.
+
+Export (needs joblib/xgboost, run once per model release):
+    python -m backend.core.treecompile [fertilizer irrigation ...]
+
+Each model is written next to its .pkl as an uncompressed .npz holding the
+evaluator's flattened node arrays (split feature, threshold, child indexes,
+default direction and leaf value), plus the input encoding layout and the
+SHA-256 of the source .pkl. With GROWWELL_MODEL_MMAP the arrays are
+memory-mapped read-only straight from the file, so every worker process
+serving the model shares one copy of its pages. The
+export refuses to write a file whose predictions differ from model.predict on
+random inputs drawn from INPUT_LIMITS. Loading and evaluating a .npz only
+needs NumPy.
+
+The evaluator beats XGBoost on single rows and micro-batches; XGBoost's own
+predictor is several times faster on bulk scoring. Setting
+GROWWELL_COMPILED_MAX_ROWS sends bigger calls to the .pkl model instead, at the
+cost of loading it (and xgboost) in every worker. tests/test_treecompile.py
+checks parity with the pickled models.
+"""
+
+import hashlib
+import io
+import json
+import os
+import struct
+import sys
+import zipfile
+import numpy as np
+from backend.core.config import INPUT_LIMITS, COMPILED_MODELS_ENABLED, FASTPATH_ENABLED, CATEGORY_FALLBACKS, MODEL_MMAP
+from backend.core.fastpath import FastPredictor, _Block, _extract_blocks
+from backend.core.vocab import build_vocabularies
+
+# Bumped when the .npz contents change; files of another format are ignored until re-exported
+COMPILED_FORMAT = 2
+
+def compiled_path(model_path):
+    return os.path.splitext(model_path)[0] + ".npz"
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class TreeEnsemble:
+    """
+    Vectorized evaluator for a compiled gbtree model.
+
+    Nodes of all trees are flattened into one array with global child indexes
+    (leaves point to themselves, see flatten_trees), so every row walks every
+    tree together, one level per step, in blocks of rows that stay
+    cache-resident. Leaf values are accumulated in float32 in tree order,
+    starting from the base score, as XGBoost's CPU predictor does.
+
+    The node arrays are used as given (they may be read-only memory maps).
+    """
+
+    ROW_BLOCK = 64
+
+    def __init__(self, children, feature, threshold, default_left, value, roots,
+                 tree_group, base_score, objective, max_depth, classes=None):
+        self.objective = objective
+        self.max_depth = max_depth
+        self.classes = classes
+        self.base_score = base_score
+        self.n_groups = len(base_score)
+        self.tree_group = tree_group
+        self.children = children
+        self.feature = feature
+        self.threshold = threshold
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self._group_trees = [np.flatnonzero(tree_group == group) for group in range(self.n_groups)]
+
+    def _leaves(self, X):
+        """Leaf values, shape (rows, trees), for a block of rows."""
+        n_rows, width = X.shape
+        has_missing = np.isnan(X).any()
+        flat = X.reshape(-1)
+        row_offset = (np.arange(n_rows, dtype=np.int64) * width)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        for _ in range(self.max_depth):
+            x = flat.take(row_offset + self.feature.take(node))
+            go_left = x < self.threshold.take(node)
+            if has_missing:
+                go_left = np.where(np.isnan(x), self.default_left.take(node), go_left)
+            node = self.children.take(2 * node + go_left)
+        return self.value.take(node)
+
+    def predict_margin(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+        margin = np.empty((n_rows, self.n_groups), dtype=np.float32)
+        for start in range(0, n_rows, self.ROW_BLOCK):
+            leaves = self._leaves(X[start:start + self.ROW_BLOCK])
+            for group, trees in enumerate(self._group_trees):
+                block = np.empty((len(leaves), len(trees) + 1), dtype=np.float32)
+                block[:, 0] = self.base_score[group]
+                block[:, 1:] = leaves[:, trees]
+                margin[start:start + len(leaves), group] = np.cumsum(block, axis=1, dtype=np.float32)[:, -1]
+        return margin
+
+    def predict_proba(self, X):
+        margin = self.predict_margin(X)
+        if self.objective.startswith("multi:"):
+            exp = np.exp(margin - margin.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+        if self.objective.startswith("binary:"):
+            positive = 1.0 / (1.0 + np.exp(-margin[:, 0]))
+            return np.column_stack([1.0 - positive, positive]).astype(np.float32)
+        raise ValueError(f"predict_proba is not available for objective {self.objective}")
+
+    def predict(self, X):
+        if self.objective.startswith("multi:"):
+            return self.classes[np.argmax(self.predict_margin(X), axis=1)]
+        if self.objective.startswith("binary:"):
+            return self.classes[(self.predict_margin(X)[:, 0] > 0).astype(int)]
+        return self.predict_margin(X)[:, 0]
+
+def flatten_trees(feature, threshold, left, right, default_left, value):
+    """
+    TreeEnsemble node arrays from per-tree (trees, nodes) arrays: one flat
+    array per field, and children[2 * node + go_left] holding the global index
+    of the next node (leaves point to themselves).
+    """
+    n_trees, n_nodes = feature.shape
+    offsets = (np.arange(n_trees, dtype=np.int64) * n_nodes)[:, None]
+    self_index = offsets + np.arange(n_nodes)[None, :]
+    is_leaf = left < 0
+    children = np.empty((n_trees, n_nodes, 2), dtype=np.int64)
+    children[:, :, 0] = np.where(is_leaf, self_index, offsets + right)
+    children[:, :, 1] = np.where(is_leaf, self_index, offsets + left)
+    return {
+        "children": children.reshape(-1),
+        "feature": feature.reshape(-1).astype(np.int64),
+        "threshold": threshold.reshape(-1),
+        "default_left": default_left.reshape(-1),
+        "value": value.reshape(-1),
+        "roots": offsets[:, 0].copy()
+    }
+
+def _booster_arrays(estimator):
+    learner = json.loads(estimator.get_booster().save_raw("json"))["learner"]
+    booster = learner["gradient_booster"]
+    if booster["name"] != "gbtree":
+        raise ValueError(f"Only gbtree boosters can be compiled, got {booster['name']}")
+    trees = booster["model"]["trees"]
+    for tree in trees:
+        if any(tree["split_type"]):
+            raise ValueError("Categorical splits are not supported")
+
+    n_nodes = max(len(tree["left_children"]) for tree in trees)
+    shape = (len(trees), n_nodes)
+    arrays = {
+        "feature": np.zeros(shape, dtype=np.int32),
+        "threshold": np.zeros(shape, dtype=np.float32),
+        "left": np.full(shape, -1, dtype=np.int32),
+        "right": np.full(shape, -1, dtype=np.int32),
+        "default_left": np.zeros(shape, dtype=bool),
+        "value": np.zeros(shape, dtype=np.float32),
+    }
+    max_depth = 0
+    for t, tree in enumerate(trees):
+        size = len(tree["left_children"])
+        left = np.array(tree["left_children"], dtype=np.int32)
+        arrays["feature"][t, :size] = tree["split_indices"]
+        arrays["threshold"][t, :size] = tree["split_conditions"]
+        arrays["left"][t, :size] = left
+        arrays["right"][t, :size] = tree["right_children"]
+        arrays["default_left"][t, :size] = np.array(tree["default_left"], dtype=bool)
+        # Leaf values live in split_conditions for leaf nodes
+        arrays["value"][t, :size] = np.where(left < 0, np.array(tree["split_conditions"], dtype=np.float32), 0.0)
+
+        depth = np.zeros(size, dtype=np.int32)
+        for node in range(size):
+            if left[node] >= 0:
+                depth[left[node]] = depth[tree["right_children"][node]] = depth[node] + 1
+        max_depth = max(max_depth, int(depth.max()))
+
+    arrays["tree_group"] = np.array(booster["model"]["tree_info"], dtype=np.int32)
+    arrays["base_score"] = np.array(json.loads(learner["learner_model_param"]["base_score"]), dtype=np.float32).reshape(-1)
+    objective = learner["objective"]["name"]
+    if objective.startswith("multi:") and len(arrays["base_score"]) == 1:
+        n_class = int(learner["learner_model_param"]["num_class"])
+        arrays["base_score"] = np.repeat(arrays["base_score"], n_class)
+    return arrays, objective, max_depth
+
+def export_model(model, columns, source_path, path=None):
+    """Compile a fitted model (XGBoost estimator or supported Pipeline) and save it as .npz."""
+    extracted = _extract_blocks(model, columns)
+    if extracted is None:
+        raise ValueError("Unsupported model layout")
+    estimator, blocks = extracted
+    arrays, objective, max_depth = _booster_arrays(estimator)
+
+    classes = getattr(estimator, "classes_", None)
+    nodes = flatten_trees(*(arrays.pop(field) for field in ("feature", "threshold", "left", "right", "default_left", "value")))
+    arrays.update(nodes)
+    layout = {
+        "format": COMPILED_FORMAT,
+        "columns": list(columns),
+        "objective": objective,
+        "max_depth": max_depth,
+        "source_sha256": file_sha256(source_path),
+        "blocks": [
+            {
+                "kind": block.kind,
+                "positions": list(block.positions),
+                "categories": block.categories,
+                "unknown": block.unknown,
+            }
+            for block in blocks
+        ],
+    }
+    if classes is not None:
+        arrays["classes"] = np.asarray(classes)
+    path = path or compiled_path(source_path)
+    _save_aligned(path, {"layout": np.array(json.dumps(layout)), **arrays})
+    return path
+
+# Member data offsets in the .npz are multiples of this, so mapped arrays are aligned
+ALIGNMENT = 64
+
+def _save_aligned(path, arrays):
+    """
+    np.savez equivalent (uncompressed, readable by np.load) whose array data
+    starts on ALIGNMENT-byte boundaries: each member's local header gets an
+    extra field padding it out. Misaligned mapped arrays are several times
+    slower to index.
+    """
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for name, array in arrays.items():
+            buffer = io.BytesIO()
+            np.lib.format.write_array(buffer, np.asanyarray(array), allow_pickle=False)
+            info = zipfile.ZipInfo(name + ".npy", date_time=(1980, 1, 1, 0, 0, 0))
+            # The .npy header is itself padded to a multiple of 64 bytes
+            header_end = archive.fp.tell() + 30 + len(info.filename.encode()) + 4
+            padding = -header_end % ALIGNMENT
+            info.extra = struct.pack("<HH", 0x7061, padding) + bytes(padding)
+            archive.writestr(info, buffer.getvalue())
+
+def _mapped_arrays(path):
+    """
+    Arrays of an uncompressed .npz, each memory-mapped read-only at its offset
+    in the file (scalars and empty arrays are read instead).
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed; re-export it with python -m backend.core.treecompile")
+            # Member data follows its local header (30 bytes, then the name and extra field)
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack("<HH", f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename[:-len(".npy")]
+            if not shape or 0 in shape or dtype.hasobject:
+                f.seek(info.header_offset + 30 + name_length + extra_length)
+                arrays[name] = np.lib.format.read_array(f, allow_pickle=False)
+                continue
+            mapped = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                               order="F" if fortran_order else "C")
+            arrays[name] = mapped.view(np.ndarray)
+    return arrays
+
+def load_compiled(path, source_path=None, fallbacks=CATEGORY_FALLBACKS, mmap=MODEL_MMAP):
+    """
+    Load a .npz written by export_model as a FastPredictor.
+
+    Returns None when the file is missing or of an older format, or when
+    source_path exists and its hash no longer matches the one recorded at
+    export time. fallbacks are the per-column fallback categories of its
+    vocabularies. With mmap the node arrays stay memory-mapped from the file.
+    """
+    if not os.path.exists(path):
+        return None
+    if mmap:
+        data = _mapped_arrays(path)
+    else:
+        with np.load(path, allow_pickle=False) as archive:
+            data = {name: archive[name] for name in archive.files}
+    layout = json.loads(str(data["layout"]))
+    if layout.get("format") != COMPILED_FORMAT:
+        print(f"Ignoring {path}: old format, re-export it with python -m backend.core.treecompile", file=sys.stderr)
+        return None
+    if source_path is not None and os.path.exists(source_path) \
+            and file_sha256(source_path) != layout["source_sha256"]:
+        return None
+    ensemble = TreeEnsemble(
+        data["children"], data["feature"], data["threshold"], data["default_left"], data["value"],
+        data["roots"], data["tree_group"], data["base_score"], layout["objective"], layout["max_depth"],
+        classes=data.get("classes")
+    )
+    blocks = [
+        _Block(block["kind"], block["positions"], block["categories"], block["unknown"])
+        for block in layout["blocks"]
+    ]
+    columns = layout["columns"]
+    return FastPredictor(ensemble, blocks, columns, build_vocabularies(blocks, columns, fallbacks=fallbacks))
+
+def load_service_model(name, model_path):
+    """
+    Compiled predictor for a service model when a valid .npz exists (and the
+    fast path is enabled), otherwise None so the service loads the .pkl.
+    """
+    if not (COMPILED_MODELS_ENABLED and FASTPATH_ENABLED):
+        return None
+    try:
+        return load_compiled(compiled_path(model_path), model_path)
+    except Exception as e:
+        print(f"Ignoring compiled {name} model: {e}", file=sys.stderr)
+        return None
+
+def random_rows(columns, limit_keys, blocks, n_rows, seed=0):
+    """
+    Random input rows (in column order): numeric columns drawn from INPUT_LIMITS
+    (half of them integer-valued, like the UI sliders), categorical columns from
+    the encoder vocabulary plus one unseen value.
+    """
+    rng = np.random.default_rng(seed)
+    categories = {}
+    for block in blocks:
+        for position, block_categories in zip(block.positions, block.categories):
+            categories[position] = list(block_categories) + ["__unseen__"]
+
+    data = []
+    for position, column in enumerate(columns):
+        if position in categories:
+            data.append(rng.choice(np.array(categories[position], dtype=object), n_rows))
+            continue
+        low, high = INPUT_LIMITS[limit_keys[column]]
+        values = rng.uniform(low, high, n_rows)
+        values[: n_rows // 2] = np.clip(np.round(values[: n_rows // 2]), low, high)
+        data.append(values)
+    return list(zip(*data))
+
+def check_parity(model, predictor, columns, limit_keys, n_rows=5000):
+    """Compare predictor against model.predict on random rows; returns (ok, max_abs_diff)."""
+    import pandas as pd
+
+    blocks = predictor.blocks
+    rows = random_rows(columns, limit_keys, blocks, n_rows)
+    expected = np.asarray(model.predict(pd.DataFrame(rows, columns=columns)))
+    actual = np.asarray(predictor.predict_rows(rows))
+    if expected.dtype.kind in "iub":
+        return bool(np.array_equal(expected, actual)), float(np.sum(expected != actual))
+    diff = float(np.max(np.abs(expected.astype(np.float64) - actual.astype(np.float64))))
+    return diff <= 1e-3, diff
+
+def service_specs():
+    """(model column order, INPUT_LIMITS key per model column) of each compilable service model."""
+    from backend.services.fertilizer_service import FERTILIZER_COLUMNS, FERTILIZER_NUMERIC_FIELDS
+    from backend.services.irrigation_service import IRRIGATION_COLUMNS, IRRIGATION_NUMERIC_FIELDS
+
+    return {
+        "fertilizer": (
+            list(FERTILIZER_COLUMNS.values()),
+            {FERTILIZER_COLUMNS[f]: key for f, key in FERTILIZER_NUMERIC_FIELDS.items()},
+        ),
+        "irrigation": (
+            list(IRRIGATION_COLUMNS.values()),
+            {IRRIGATION_COLUMNS[f]: key for f, key in IRRIGATION_NUMERIC_FIELDS.items()},
+        ),
+    }
+
+def main(argv=None):
+    import joblib
+    from backend.core.config import MODEL_PATHS
+
+    specs = service_specs()
+    names = (argv if argv is not None else sys.argv[1:]) or list(specs)
+    failed = False
+    for name in names:
+        columns, limit_keys = specs[name]
+        source = MODEL_PATHS[name]
+        model = joblib.load(source)
+        target = compiled_path(source)
+        staging = target + ".tmp.npz"
+        export_model(model, columns, source, staging)
+        # Unseen categories must hit the encoder's own unknown handling, as in model.predict
+        ok, diff = check_parity(model, load_compiled(staging, fallbacks={}), columns, limit_keys)
+        if not ok:
+            os.remove(staging)
+            print(f"{name}: parity check failed (diff {diff}), not written")
+            failed = True
+            continue
+        os.replace(staging, target)
+        print(f"{name}: wrote {target} ({os.path.getsize(target) / 1024:.0f} KiB, parity diff {diff})")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# backend/core/validation.py
+
+import functools
+import numpy as np
+from backend.core.config import INPUT_LIMITS
+
+class RangeCheck:
+    """
+    Bounds check for a fixed list of numeric inputs, compiled once from INPUT_LIMITS.
+
+    fields are (INPUT_LIMITS key, label) pairs in argument order; the label is
+    formatted with the offending value, e.g. "Nitrogen {} kg/ha". errors() is
+    the per-request check: one pass of plain comparisons against the bounds,
+    with messages only built when one fails.
+    out_of_range() checks a whole (rows x fields) array in one comparison.
+    """
+
+    def __init__(self, fields):
+        self.keys = [key for key, _ in fields]
+        self.labels = [label for _, label in fields]
+        self.bounds = tuple((INPUT_LIMITS[key][0], INPUT_LIMITS[key][1]) for key in self.keys)
+        self.low = np.array([low for low, _ in self.bounds], dtype=float)
+        self.high = np.array([high for _, high in self.bounds], dtype=float)
+
+    def ok(self, values):
+        for value, (low, high) in zip(values, self.bounds):
+            if not low <= value <= high:
+                return False
+        return True
+
+    def errors(self, values):
+        if self.ok(values):
+            return []
+        return [self.message(j, value) for j, (value, (low, high)) in enumerate(zip(values, self.bounds))
+                if not (low <= value <= high)]
+
+    def message(self, j, value):
+        return f"{self.labels[j].format(value)} is out of range {INPUT_LIMITS[self.keys[j]]}"
+
+    def out_of_range(self, values):
+        """Boolean mask of values outside their limits (NaN counts as in range)."""
+        return (values < self.low) | (values > self.high)
+
+@functools.lru_cache(maxsize=None)
+def range_check(fields):
+    """Shared RangeCheck for a tuple of (INPUT_LIMITS key, label) pairs."""
+    return RangeCheck(fields)
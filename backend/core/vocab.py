@@ -0,0 +1,115 @@
+# backend/core/vocab.py
+
+import numpy as np
+from backend.core.config import CATEGORY_ALIASES, CATEGORY_FALLBACKS, CATEGORY_NORMALIZE
+
+UNKNOWN = -1
+
+# Raw spellings remembered per vocabulary (beyond that, lookups still work, just uncached)
+MAX_INTERNED = 1024
+
+def normalize(value):
+    """Case- and whitespace-insensitive form of a category string."""
+    return " ".join(value.split()).casefold()
+
+class Vocabulary:
+    """
+    Categories of one encoded input column, interned to small integer codes.
+
+    Codes are positions in the encoder's fitted categories (the one-hot column
+    offset / ordinal value the model was trained with). Values are matched
+    exactly first; with normalize_case also ignoring case and extra whitespace
+    and through aliases (alternative spelling -> category, matched the same
+    way). Anything else gets the fallback category's code when one is declared,
+    otherwise UNKNOWN, so by default encoding matches the model's own encoder.
+    """
+
+    def __init__(self, column, categories, aliases=None, fallback=None, normalize_case=CATEGORY_NORMALIZE):
+        self.column = column
+        self.categories = list(categories)
+        self._codes = {}
+        for code, category in enumerate(self.categories):
+            self._codes[category] = code
+        self._known = dict(self._codes)
+        # Category names and aliases ignoring case and spacing; used for encoding only with normalize_case
+        self._folded = {}
+        for code, category in enumerate(self.categories):
+            if isinstance(category, str):
+                self._folded.setdefault(normalize(category), code)
+        for alias, target in (aliases or {}).items():
+            code = self._loose(target)
+            if code != UNKNOWN:
+                self._folded.setdefault(normalize(alias), code)
+        self._normalized = self._folded if normalize_case else {}
+        self.fallback = UNKNOWN
+        if fallback is not None:
+            self.fallback = self._loose(fallback)
+            if self.fallback == UNKNOWN:
+                raise ValueError(f"Fallback {fallback!r} for {column} is not one of {self.categories}")
+        # False when encoding only accepts the exact categories, as the model's own encoder does
+        self.rewrites = bool(self._normalized) or self.fallback != UNKNOWN
+        self._n_fixed = len(self._codes)
+
+    def _resolve(self, value):
+        code = self._codes.get(value)
+        if code is None and isinstance(value, str):
+            code = self._normalized.get(normalize(value))
+        return UNKNOWN if code is None else code
+
+    def _loose(self, value):
+        # Like _resolve (without interned spellings), always ignoring case and spacing and applying aliases
+        code = self._known.get(value)
+        if code is None and isinstance(value, str):
+            code = self._folded.get(normalize(value))
+        return UNKNOWN if code is None else code
+
+    def code(self, value):
+        """Code of one value (the fallback code or UNKNOWN if it isn't a known category)."""
+        try:
+            code = self._codes.get(value)
+        except TypeError:
+            return self.fallback
+        if code is None:
+            code = self._resolve(value)
+            if code == UNKNOWN:
+                code = self.fallback
+            if len(self._codes) - self._n_fixed < MAX_INTERNED:
+                # Intern the raw spelling so the next lookup is a single dict hit
+                self._codes[value] = code
+        return code
+
+    def lookup(self, value):
+        """
+        Category value names (aliases applied, fallback not), or None. Names
+        and aliases are matched ignoring case whether or not encoding
+        normalizes them, e.g. to find "maize" from the crop model in another
+        model's "Maize".
+        """
+        try:
+            code = self._loose(value)
+        except TypeError:
+            return None
+        return None if code == UNKNOWN else self.categories[code]
+
+    def encode(self, values):
+        """Codes for an array of values: one lookup per distinct value, then a vectorized take."""
+        if len(values) == 1:
+            return np.array([self.code(values[0])], dtype=np.int64)
+        import pandas as pd
+
+        positions, distinct = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+        # Missing values (position -1) pick the appended fallback entry
+        table = np.array([self.code(value) for value in distinct] + [self.fallback], dtype=np.int64)
+        return table[positions]
+
+    def unknown_message(self, value):
+        return f"{self.column} {value!r} is not one of {', '.join(map(str, self.categories))}"
+
+def build_vocabularies(blocks, columns, aliases=CATEGORY_ALIASES, fallbacks=CATEGORY_FALLBACKS):
+    """Vocabulary per categorical input position of a fast-path block layout."""
+    vocabularies = {}
+    for block in blocks:
+        for position, categories in zip(block.positions, block.categories):
+            column = columns[position]
+            vocabularies[position] = Vocabulary(column, categories, aliases.get(column), fallbacks.get(column))
+    return vocabularies
@@ -0,0 +1,240 @@
+# backend/core/weather.py
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from backend.core.config import (
+    WEATHER_PROVIDER, WEATHER_FILE, OPENWEATHER_API_KEY, WEATHER_GEOHASH_PRECISION, WEATHER_BUCKET_SECONDS,
+    WEATHER_TTL_SECONDS, WEATHER_MAX_ENTRIES, WEATHER_TIMEOUT_SECONDS, WEATHER_PREFETCH_CONCURRENCY
+)
+from backend.core.metrics import register_stats, observe_stage, count_error
+
+# Weather values a provider returns (°C, %, mm)
+WEATHER_FIELDS = ("temperature", "humidity", "rainfall")
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+class WeatherUnavailable(RuntimeError):
+    """Raised when no weather could be obtained for a location."""
+
+def geohash(latitude, longitude, precision=WEATHER_GEOHASH_PRECISION):
+    """Standard base-32 geohash of a point (precision 5 is a cell of about 5 x 5 km)."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+def cell_center(cell):
+    """(latitude, longitude) of the center of a geohash cell."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            interval[0 if (value >> shift) & 1 else 1] = middle
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+class MemoryProvider:
+    """
+    In-memory stand-in provider: table maps geohash prefixes to weather dicts;
+    the longest prefix of the requested cell wins. fetches counts calls, so
+    tests can check how many upstream lookups were made.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.fetches = 0
+
+    def fetch(self, latitude, longitude):
+        self.fetches += 1
+        cell = geohash(latitude, longitude, 12)
+        for length in range(len(cell), 0, -1):
+            weather = self.table.get(cell[:length])
+            if weather is not None:
+                return {field: float(weather[field]) for field in WEATHER_FIELDS if field in weather}
+        raise WeatherUnavailable(f"No weather data for {latitude:.4f}, {longitude:.4f}")
+
+class FileProvider(MemoryProvider):
+    """MemoryProvider reading its table from a JSON file ({"tdr1": {"temperature": 27.5, ...}, ...})."""
+
+    def __init__(self, path):
+        with open(path) as f:
+            super().__init__(json.load(f))
+
+class OpenWeatherProvider:
+    """
+    Current conditions from the OpenWeather API. Rainfall is the last hour's
+    precipitation (0 when none is reported).
+    """
+
+    URL = "https://api.openweathermap.org/data/2.5/weather"
+
+    def __init__(self, api_key, timeout=WEATHER_TIMEOUT_SECONDS):
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def fetch(self, latitude, longitude):
+        import requests
+
+        response = requests.get(self.URL, params={
+            "lat": latitude, "lon": longitude, "appid": self.api_key, "units": "metric"
+        }, timeout=self.timeout)
+        data = response.json()
+        if response.status_code != 200:
+            raise WeatherUnavailable(f"Weather API error: {data.get('message', response.status_code)}")
+        return {
+            "temperature": float(data["main"]["temp"]),
+            "humidity": float(data["main"]["humidity"]),
+            "rainfall": float(data.get("rain", {}).get("1h", 0.0))
+        }
+
+class WeatherCache:
+    """
+    Weather per (geohash cell, time bucket), fetched from provider at the cell
+    center and kept for ttl_seconds in a bounded LRU.
+
+    Lookups for a cell that is being fetched wait for that fetch instead of
+    starting another one, so many farms in one area cost a single upstream call.
+    prefetch() resolves the distinct cells of many points concurrently.
+    """
+
+    def __init__(self, provider, precision=WEATHER_GEOHASH_PRECISION, bucket_seconds=WEATHER_BUCKET_SECONDS,
+                 ttl_seconds=WEATHER_TTL_SECONDS, max_entries=WEATHER_MAX_ENTRIES, timeout=WEATHER_TIMEOUT_SECONDS):
+        self.provider = provider
+        self.precision = precision
+        self.bucket_seconds = bucket_seconds
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = self.misses = self.coalesced = self.fetches = self.errors = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def key(self, latitude, longitude, when=None):
+        return geohash(latitude, longitude, self.precision), int((time.time() if when is None else when) // self.bucket_seconds)
+
+    def get(self, latitude, longitude, when=None):
+        """Weather dict for a point; raises WeatherUnavailable."""
+        key = self.key(latitude, longitude, when)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            try:
+                return future.result(self.timeout)
+            except FutureTimeout:
+                raise WeatherUnavailable(f"Weather lookup for {key[0]} timed out") from None
+        return self._fetch(key, future)
+
+    def _fetch(self, key, future):
+        started = time.perf_counter()
+        try:
+            weather = self.provider.fetch(*cell_center(key[0]))
+        except Exception as e:
+            error = e if isinstance(e, WeatherUnavailable) else WeatherUnavailable(f"Weather lookup failed: {e}")
+            with self._lock:
+                self.errors += 1
+                del self._inflight[key]
+            count_error("weather", "fetch_failed")
+            future.set_exception(error)
+            raise error from e
+        finally:
+            observe_stage("weather", "fetch", time.perf_counter() - started)
+        with self._lock:
+            self.fetches += 1
+            self._entries[key] = (weather, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._inflight[key]
+        future.set_result(weather)
+        return weather
+
+    async def prefetch(self, points, concurrency=WEATHER_PREFETCH_CONCURRENCY):
+        """
+        Resolve (latitude, longitude) points with at most `concurrency` lookups
+        in flight, one per distinct cell. Returns a list aligned with points of
+        weather dicts or WeatherUnavailable instances.
+        """
+        keys = [self.key(latitude, longitude) for latitude, longitude in points]
+        cells = {}
+        for key, point in zip(keys, points):
+            cells.setdefault(key, point)
+        limit = asyncio.Semaphore(concurrency)
+
+        async def lookup(point):
+            async with limit:
+                return await asyncio.to_thread(self.get, *point)
+
+        found = await asyncio.gather(*(lookup(point) for point in cells.values()), return_exceptions=True)
+        by_key = {}
+        for key, result in zip(cells, found):
+            if isinstance(result, Exception) and not isinstance(result, WeatherUnavailable):
+                result = WeatherUnavailable(f"Weather lookup failed: {result}")
+            by_key[key] = result
+        return [by_key[key] for key in keys]
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "provider": type(self.provider).__name__,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "fetches": self.fetches,
+            "errors": self.errors
+        }
+
+def weather_provider(kind=WEATHER_PROVIDER):
+    """The configured provider, or None when weather enrichment is off."""
+    if kind == "openweather":
+        if not OPENWEATHER_API_KEY:
+            raise ValueError("GROWWELL_WEATHER_PROVIDER=openweather needs OPENWEATHER_API_KEY")
+        return OpenWeatherProvider(OPENWEATHER_API_KEY)
+    if kind == "file":
+        return FileProvider(WEATHER_FILE)
+    return None
+
+def weather_cache(provider=None):
+    """WeatherCache over provider (default: the configured one), or None when there is none."""
+    provider = provider or weather_provider()
+    if provider is None:
+        return None
+    cache = WeatherCache(provider)
+    register_stats("weather", cache.stats)
+    return cache
@@ -1,19 +1,50 @@
 # backend/routes/crop.py
 
-from fastapi import APIRouter
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from backend.core.config import BATCH_MAX_RECORDS
+from backend.core.executor import inference, request_timeout
+from backend.core.tracing import TimedRoute
+from backend.core.weather import WeatherUnavailable
+from backend.schemas.batch_input import batch_body
 from backend.schemas.crop_input import CropInput
-from backend.services.crop_service import recommend_crop
+from backend.services.crop_service import recommend_crop_validated, recommend_crop_batch
+from backend.services.weather_service import ClimateInputError, complete_record, complete_records, with_errors
 
-router = APIRouter(prefix="/crop", tags=["Crop"])
+router = APIRouter(prefix="/crop", tags=["Crop"], route_class=TimedRoute)
 
 @router.post("/recommend")
-def crop_recommendation(input: CropInput):
-    return recommend_crop(
-        n=input.N,
-        p=input.P,
-        k=input.K,
-        ph=input.ph,
-        temperature=input.temperature,
-        humidity=input.humidity,
-        rainfall=input.rainfall
+async def crop_recommendation(input: CropInput, response: Response, timeout: float = Depends(request_timeout),
+                              top_k: int = Query(None, ge=1, description="Return the k most probable crops")):
+    try:
+        record = await complete_record("crop", input.model_dump())
+    except ClimateInputError as e:
+        raise HTTPException(status_code=422, detail=e.details)
+    except WeatherUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    result, headers = await inference.run(
+        "crop",
+        recommend_crop_validated,
+        timeout=timeout,
+        n=record["N"],
+        p=record["P"],
+        k=record["K"],
+        ph=record["ph"],
+        temperature=record["temperature"],
+        humidity=record["humidity"],
+        rainfall=record["rainfall"],
+        top_k=top_k
     )
+    response.headers.update(headers)
+    return result
+
+@router.post("/recommend/batch")
+async def crop_recommendation_batch(response: Response, records: List[Dict[str, Any]] = batch_body(CropInput),
+                                    timeout: float = Depends(request_timeout), top_k: int = Query(None, ge=1)):
+    # Each record has the CropInput fields; invalid rows get their own error entry
+    if len(records) > BATCH_MAX_RECORDS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_RECORDS} records")
+    records, weather_errors = await complete_records("crop", records)
+    results, headers = await inference.run("crop", recommend_crop_batch, records, top_k, timeout=timeout)
+    response.headers.update(headers)
+    return {"results": with_errors(results, weather_errors)}
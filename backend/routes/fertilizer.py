@@ -1,27 +1,57 @@
 # backend/routes/fertilizer.py
-from fastapi import APIRouter
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import JSONResponse
+from backend.core.config import BATCH_MAX_RECORDS
+from backend.core.executor import inference, request_timeout
+from backend.core.tracing import TimedRoute
+from backend.core.weather import WeatherUnavailable
+from backend.schemas.batch_input import batch_body
 from backend.schemas.fertilizer_input import FertilizerInput
-from backend.services.fertilizer_service import recommend_fertilizer
+from backend.services.fertilizer_service import recommend_fertilizer, recommend_fertilizer_batch
+from backend.services.weather_service import ClimateInputError, complete_record, complete_records, with_errors
 
-router = APIRouter(prefix="/fertilizer", tags=["Fertilizer"])
+router = APIRouter(prefix="/fertilizer", tags=["Fertilizer"], route_class=TimedRoute)
 
 @router.post("/recommend")
-def fertilizer_recommendation(payload: FertilizerInput):
+async def fertilizer_recommendation(payload: FertilizerInput, timeout: float = Depends(request_timeout),
+                                    top_k: int = Query(None, ge=1, description="Return the k most probable fertilizers")):
     try:
-        result = recommend_fertilizer({
-            "Temparature": payload.Temparature,
-            "Humidity": payload.Humidity,
-            "Moisture": payload.Moisture,
-            "Soil_Type": payload.Soil_Type,
-            "Crop_Type": payload.Crop_Type,
-            "Nitrogen": payload.Nitrogen,
-            "Potassium": payload.Potassium,
-            "Phosphorous": payload.Phosphorous
-        })
+        record = await complete_record("fertilizer", payload.model_dump())
+    except ClimateInputError as e:
+        raise HTTPException(status_code=422, detail=e.details)
+    except WeatherUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    try:
+        result, headers = await inference.run("fertilizer", recommend_fertilizer, {
+            "Temparature": record["Temparature"],
+            "Humidity": record["Humidity"],
+            "Moisture": record["Moisture"],
+            "Soil_Type": record["Soil_Type"],
+            "Crop_Type": record["Crop_Type"],
+            "Nitrogen": record["Nitrogen"],
+            "Potassium": record["Potassium"],
+            "Phosphorous": record["Phosphorous"]
+        }, top_k, timeout=timeout)
 
         # Always return fertilizer name
-        return JSONResponse(content={"fertilizer": result})
+        return JSONResponse(content={"fertilizer": result}, headers=headers)
+
+    except HTTPException:
+        # Saturation (503) and deadline (504) keep their status codes
+        raise
 
     except Exception as e:
         return JSONResponse(content={"error": "Fertilizer prediction failed", "details": str(e)})
+
+@router.post("/recommend/batch")
+async def fertilizer_recommendation_batch(response: Response, records: List[Dict[str, Any]] = batch_body(FertilizerInput),
+                                          timeout: float = Depends(request_timeout), top_k: int = Query(None, ge=1)):
+    # Each record has the FertilizerInput fields; invalid rows get their own error entry
+    if len(records) > BATCH_MAX_RECORDS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_RECORDS} records")
+    records, weather_errors = await complete_records("fertilizer", records)
+    results, headers = await inference.run("fertilizer", recommend_fertilizer_batch, records, top_k, timeout=timeout)
+    response.headers.update(headers)
+    return {"results": with_errors(results, weather_errors)}
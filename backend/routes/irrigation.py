@@ -1,24 +1,53 @@
 # backend/routes/irrigation.py
 
-from fastapi import APIRouter
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from backend.core.config import BATCH_MAX_RECORDS
+from backend.core.executor import inference, request_timeout
+from backend.core.tracing import TimedRoute
+from backend.core.weather import WeatherUnavailable
+from backend.schemas.batch_input import batch_body
 from backend.schemas.irrigation_input import IrrigationInput
-from backend.services.irrigation_service import predict_irrigation
+from backend.services.irrigation_service import predict_irrigation_validated, predict_irrigation_batch
+from backend.services.weather_service import ClimateInputError, complete_record, complete_records, with_errors
 
-router = APIRouter(prefix="/irrigation", tags=["Irrigation"])
+router = APIRouter(prefix="/irrigation", tags=["Irrigation"], route_class=TimedRoute)
 
 @router.post("/predict")
-def irrigation_prediction(input: IrrigationInput):
-    return predict_irrigation(
-        crop_type=input.Crop_Type,
-        soil_type=input.Soil_Type,
-        season=input.Season,
-        farm_area=input.Farm_Area,
-        soil_moisture=input.Soil_Moisture,
-        temperature=input.Temperature,
-        rainfall=input.Rainfall,
-        n=input.Nitrogen if hasattr(input, "Nitrogen") else input.Nitrogen,
-        p=input.Phosphorus,
-        k=input.Potassium,
-        ph=input.Soil_pH,
-        region=input.Region
+async def irrigation_prediction(input: IrrigationInput, response: Response, timeout: float = Depends(request_timeout)):
+    try:
+        record = await complete_record("irrigation", input.model_dump())
+    except ClimateInputError as e:
+        raise HTTPException(status_code=422, detail=e.details)
+    except WeatherUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    result, headers = await inference.run(
+        "irrigation",
+        predict_irrigation_validated,
+        timeout=timeout,
+        crop_type=record["Crop_Type"],
+        soil_type=record["Soil_Type"],
+        season=record["Season"],
+        farm_area=record["Farm_Area"],
+        soil_moisture=record["Soil_Moisture"],
+        temperature=record["Temperature"],
+        rainfall=record["Rainfall"],
+        n=record["Nitrogen"],
+        p=record["Phosphorus"],
+        k=record["Potassium"],
+        ph=record["Soil_pH"],
+        region=record["Region"]
     )
+    response.headers.update(headers)
+    return result
+
+@router.post("/predict/batch")
+async def irrigation_prediction_batch(response: Response, records: List[Dict[str, Any]] = batch_body(IrrigationInput),
+                                      timeout: float = Depends(request_timeout)):
+    # Each record has the IrrigationInput fields; invalid rows get their own error entry
+    if len(records) > BATCH_MAX_RECORDS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_RECORDS} records")
+    records, weather_errors = await complete_records("irrigation", records)
+    results, headers = await inference.run("irrigation", predict_irrigation_batch, records, timeout=timeout)
+    response.headers.update(headers)
+    return {"results": with_errors(results, weather_errors)}
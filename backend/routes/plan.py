@@ -0,0 +1,36 @@
+# backend/routes/plan.py
+
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from backend.core.config import BATCH_MAX_RECORDS
+from backend.core.executor import request_timeout
+from backend.core.tracing import TimedRoute
+from backend.core.weather import WeatherUnavailable
+from backend.schemas.batch_input import batch_body
+from backend.schemas.plan_input import PlanInput
+from backend.services.plan_service import plan, plan_batch
+from backend.services.weather_service import ClimateInputError
+
+router = APIRouter(prefix="/plan", tags=["Plan"], route_class=TimedRoute)
+
+@router.post("")
+async def farm_plan(input: PlanInput, response: Response, timeout: float = Depends(request_timeout)):
+    # Crop, fertilizer and irrigation for one farm in one call
+    try:
+        result, headers = await plan(input.model_dump(), timeout)
+    except ClimateInputError as e:
+        raise HTTPException(status_code=422, detail=e.details)
+    except WeatherUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    response.headers.update(headers)
+    return result
+
+@router.post("/batch")
+async def farm_plan_batch(response: Response, records: List[Dict[str, Any]] = batch_body(PlanInput),
+                          timeout: float = Depends(request_timeout)):
+    # Each record has the PlanInput fields; invalid rows get their own error entry
+    if len(records) > BATCH_MAX_RECORDS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_RECORDS} records")
+    result, headers = await plan_batch(records, timeout)
+    response.headers.update(headers)
+    return result
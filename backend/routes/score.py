@@ -0,0 +1,68 @@
+# backend/routes/score.py
+
+import asyncio
+import codecs
+import io
+import tempfile
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from backend.core.config import BATCH_CHUNK_SIZE, STREAM_SPOOL_BYTES, INFERENCE_RETRY_AFTER_SECONDS
+from backend.core.executor import inference, request_timeout
+from backend.core.stream import read_raw, chunked, score_raw, format_header, format_rows
+from backend.core.tracing import TimedRoute
+from backend.services.scoring_service import SCORERS
+
+router = APIRouter(prefix="/score", tags=["Scoring"], route_class=TimedRoute)
+
+@router.post("/stream")
+async def score_stream(request: Request, model: str, format: str = "jsonl", timeout: float = Depends(request_timeout)):
+    """
+    Score a JSONL (or format=csv) request body and stream one result row per
+    record back in the same format. timeout applies to each chunk, including
+    its retries while the inference pool is saturated; a chunk that runs out
+    of time gets an error row per record.
+    """
+    if model not in SCORERS:
+        raise HTTPException(status_code=404, detail=f"Unknown model {model!r}")
+    if format not in ("jsonl", "csv"):
+        raise HTTPException(status_code=400, detail="format must be jsonl or csv")
+
+    # Buffer the upload (on disk once it is large) so reading input never competes with the response.
+    # It is checked to be UTF-8 on the way in: once streaming starts a decode error can't become a 400
+    spool = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_BYTES)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        async for data in request.stream():
+            decoder.decode(data)
+            spool.write(data)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        spool.close()
+        raise HTTPException(status_code=400, detail=f"Request body is not valid UTF-8: {e}")
+    spool.seek(0)
+    lines = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+
+    async def results():
+        try:
+            yield format_header(format)
+            header, raw = read_raw(lines, format)
+            for start, chunk in chunked(raw, BATCH_CHUNK_SIZE):
+                deadline = time.monotonic() + timeout
+                while True:
+                    try:
+                        rows, _ = await inference.run(model, score_raw, model, start, chunk, format, header,
+                                                      timeout=max(deadline - time.monotonic(), 0.001))
+                    except HTTPException as e:
+                        if e.status_code == 503 and time.monotonic() + INFERENCE_RETRY_AFTER_SECONDS < deadline:
+                            await asyncio.sleep(INFERENCE_RETRY_AFTER_SECONDS)
+                            continue
+                        # The status line is already sent: report the failure per record
+                        rows = [{"index": start + i, "error": e.detail} for i in range(len(chunk))]
+                    break
+                yield format_rows(rows, format)
+        finally:
+            lines.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(results(), media_type=media_type)
@@ -0,0 +1,24 @@
+# backend/routes/sweep.py
+
+from fastapi import APIRouter, Depends, Response
+from backend.core.executor import inference, request_timeout
+from backend.core.tracing import TimedRoute
+from backend.schemas.sweep_input import SweepInput
+from backend.services.sweep_service import run_sweep
+
+router = APIRouter(prefix="/sweep", tags=["What-if"], route_class=TimedRoute)
+
+@router.post("")
+async def sweep(input: SweepInput, response: Response, timeout: float = Depends(request_timeout)):
+    # One or two features of input.base swept over a grid, scored in one batch
+    result, headers = await inference.run(
+        input.model,
+        run_sweep,
+        input.model,
+        input.base,
+        [r.model_dump() for r in input.ranges],
+        input.partial_dependence,
+        timeout=timeout
+    )
+    response.headers.update(headers)
+    return result
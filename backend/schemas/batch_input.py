@@ -0,0 +1,12 @@
+# backend/schemas/batch_input.py
+
+from fastapi import Body
+
+def batch_body(schema):
+    """
+    Request body for a batch route: a list of records documented as schema
+    items. The records arrive as plain dicts and are validated together by
+    prepare_batch, so one invalid record gets its own error entry instead of
+    rejecting the whole batch with a 422.
+    """
+    return Body(..., json_schema_extra={"items": schema.model_json_schema()})
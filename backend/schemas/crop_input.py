@@ -1,5 +1,6 @@
 # backend/schemas/crop_input.py
 
+from typing import Optional
 from pydantic import BaseModel, Field
 from backend.core.config import INPUT_LIMITS
 
@@ -8,6 +9,10 @@ class CropInput(BaseModel):
     P: float = Field(..., ge=INPUT_LIMITS["p"][0], le=INPUT_LIMITS["p"][1], description="Phosphorus (kg/ha)")
     K: float = Field(..., ge=INPUT_LIMITS["k"][0], le=INPUT_LIMITS["k"][1], description="Potassium (kg/ha)")
     ph: float = Field(..., ge=INPUT_LIMITS["ph"][0], le=INPUT_LIMITS["ph"][1], description="Soil pH")
-    temperature: float = Field(..., ge=INPUT_LIMITS["temperature"][0], le=INPUT_LIMITS["temperature"][1], description="Temperature °C")
-    humidity: float = Field(..., ge=INPUT_LIMITS["humidity"][0], le=INPUT_LIMITS["humidity"][1], description="Humidity %")
-    rainfall: float = Field(..., ge=INPUT_LIMITS["rainfall"][0], le=INPUT_LIMITS["rainfall"][1], description="Rainfall mm/day")
+    temperature: Optional[float] = Field(None, ge=INPUT_LIMITS["temperature"][0], le=INPUT_LIMITS["temperature"][1], description="Temperature °C")
+    humidity: Optional[float] = Field(None, ge=INPUT_LIMITS["humidity"][0], le=INPUT_LIMITS["humidity"][1], description="Humidity %")
+    rainfall: Optional[float] = Field(None, ge=INPUT_LIMITS["rainfall"][0], le=INPUT_LIMITS["rainfall"][1], description="Rainfall mm/day")
+
+    # Location for filling omitted climate fields from the local weather (GROWWELL_WEATHER_PROVIDER)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
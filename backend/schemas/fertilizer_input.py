@@ -1,9 +1,10 @@
+from typing import Optional
 from pydantic import BaseModel, Field
 from backend.core.config import INPUT_LIMITS
 
 class FertilizerInput(BaseModel):
-    Temparature: float = Field(..., ge=INPUT_LIMITS["temperature"][0], le=INPUT_LIMITS["temperature"][1], alias="Temparature")
-    Humidity: float = Field(..., ge=INPUT_LIMITS["humidity"][0], le=INPUT_LIMITS["humidity"][1], alias="Humidity")
+    Temparature: Optional[float] = Field(None, ge=INPUT_LIMITS["temperature"][0], le=INPUT_LIMITS["temperature"][1], alias="Temparature")
+    Humidity: Optional[float] = Field(None, ge=INPUT_LIMITS["humidity"][0], le=INPUT_LIMITS["humidity"][1], alias="Humidity")
     Moisture: float = Field(..., ge=INPUT_LIMITS["soil_moisture"][0], le=INPUT_LIMITS["soil_moisture"][1], alias="Moisture")
     Soil_Type: str = Field(..., alias="Soil_Type")
     Crop_Type: str = Field(..., alias="Crop_Type")
@@ -11,5 +12,9 @@ class FertilizerInput(BaseModel):
     Potassium: float = Field(..., ge=INPUT_LIMITS["k"][0], le=INPUT_LIMITS["k"][1], alias="Potassium")
     Phosphorous: float = Field(..., ge=INPUT_LIMITS["p"][0], le=INPUT_LIMITS["p"][1], alias="Phosphorous")
 
+    # Location for filling omitted climate fields from the local weather (GROWWELL_WEATHER_PROVIDER)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
     class Config:
         allow_population_by_field_name = True
@@ -1,5 +1,6 @@
 # backend/schemas/irrigation_input.py
 
+from typing import Optional
 from pydantic import BaseModel, Field
 from backend.core.config import INPUT_LIMITS
 
@@ -15,5 +16,9 @@ class IrrigationInput(BaseModel):
     Phosphorus: float = Field(..., ge=INPUT_LIMITS["p"][0], le=INPUT_LIMITS["p"][1])
     Potassium: float = Field(..., ge=INPUT_LIMITS["k"][0], le=INPUT_LIMITS["k"][1])
     Soil_Moisture: float = Field(..., ge=INPUT_LIMITS["soil_moisture"][0], le=INPUT_LIMITS["soil_moisture"][1])
-    Temperature: float = Field(..., ge=INPUT_LIMITS["temperature"][0], le=INPUT_LIMITS["temperature"][1], description="Temperature °C")
-    Rainfall: float = Field(..., ge=INPUT_LIMITS["rainfall"][0], le=INPUT_LIMITS["rainfall"][1], description="Rainfall mm")
+    Temperature: Optional[float] = Field(None, ge=INPUT_LIMITS["temperature"][0], le=INPUT_LIMITS["temperature"][1], description="Temperature °C")
+    Rainfall: Optional[float] = Field(None, ge=INPUT_LIMITS["rainfall"][0], le=INPUT_LIMITS["rainfall"][1], description="Rainfall mm")
+
+    # Location for filling omitted climate fields from the local weather (GROWWELL_WEATHER_PROVIDER)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
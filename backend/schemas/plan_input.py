@@ -0,0 +1,24 @@
+# backend/schemas/plan_input.py
+
+from typing import Optional
+from pydantic import BaseModel, Field
+from backend.core.config import INPUT_LIMITS
+
+class PlanInput(BaseModel):
+    N: float = Field(..., ge=INPUT_LIMITS["n"][0], le=INPUT_LIMITS["n"][1], description="Nitrogen (kg/ha)")
+    P: float = Field(..., ge=INPUT_LIMITS["p"][0], le=INPUT_LIMITS["p"][1], description="Phosphorus (kg/ha)")
+    K: float = Field(..., ge=INPUT_LIMITS["k"][0], le=INPUT_LIMITS["k"][1], description="Potassium (kg/ha)")
+    ph: float = Field(..., ge=INPUT_LIMITS["ph"][0], le=INPUT_LIMITS["ph"][1], description="Soil pH")
+    temperature: Optional[float] = Field(None, ge=INPUT_LIMITS["temperature"][0], le=INPUT_LIMITS["temperature"][1], description="Temperature °C")
+    humidity: Optional[float] = Field(None, ge=INPUT_LIMITS["humidity"][0], le=INPUT_LIMITS["humidity"][1], description="Humidity %")
+    rainfall: Optional[float] = Field(None, ge=INPUT_LIMITS["rainfall"][0], le=INPUT_LIMITS["rainfall"][1], description="Rainfall mm")
+    soil_moisture: float = Field(..., ge=INPUT_LIMITS["soil_moisture"][0], le=INPUT_LIMITS["soil_moisture"][1], description="Soil moisture %")
+    farm_area: float = Field(..., ge=INPUT_LIMITS["farm_area"][0], le=INPUT_LIMITS["farm_area"][1], description="Farm area (acres)")
+    soil_type: str
+    region: str
+    season: str
+    crop_type: Optional[str] = Field(None, description="Crop to plan fertilizer and irrigation for (default: the recommended crop)")
+
+    # Location for filling omitted climate fields from the local weather (GROWWELL_WEATHER_PROVIDER)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
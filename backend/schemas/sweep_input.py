@@ -0,0 +1,17 @@
+# backend/schemas/sweep_input.py
+
+from typing import Any, Dict, List, Literal
+from pydantic import BaseModel, Field
+from backend.core.config import SWEEP_MAX_POINTS
+
+class SweepRange(BaseModel):
+    feature: str = Field(..., description="Numeric input field to vary, e.g. Rainfall")
+    start: float
+    stop: float
+    steps: int = Field(..., ge=2, le=SWEEP_MAX_POINTS, description="Evenly spaced values from start to stop, inclusive")
+
+class SweepInput(BaseModel):
+    model: Literal["crop", "fertilizer", "irrigation"]
+    base: Dict[str, Any] = Field(..., description="Input record (same fields as the model's endpoint)")
+    ranges: List[SweepRange] = Field(..., min_length=1, max_length=2)
+    partial_dependence: bool = False
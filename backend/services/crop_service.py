@@ -1,56 +1,176 @@
 # backend/services/crop_service.py
 
-import joblib
-import pandas as pd
-import numpy as np
 import traceback
-from backend.core.config import MODEL_PATHS, INPUT_LIMITS, CROP_MAPPING
+from backend.core.config import MODEL_PATHS, INPUT_LIMITS, CROP_MAPPING, MICROBATCH_ENABLED
+from backend.core.batch import run_batch
+from backend.core.cache import prediction_cache
+from backend.core.executor import inference
+from backend.core.fastpath import Predictor, top_k as rank_classes
+from backend.core.lookup import lookup_table
+from backend.core.metrics import span, count_error
+from backend.core.microbatch import MicroBatcher
+from backend.core.registry import registry, load_pickle, ModelUnavailable
+from backend.core.treecompile import load_service_model
+from backend.core.validation import range_check
 
-# Load crop model
-try:
-    model = joblib.load(MODEL_PATHS["crop"])
-except Exception as e:
-    raise RuntimeError(f"Failed to load crop model: {str(e)}")
+# Batch record keys (CropInput field names) -> INPUT_LIMITS keys, in model column order
+CROP_FIELDS = {
+    "N": "n",
+    "P": "p",
+    "K": "k",
+    "ph": "ph",
+    "temperature": "temperature",
+    "humidity": "humidity",
+    "rainfall": "rainfall"
+}
+
+def _load_model(path):
+    # The compiled .npz from backend.core.treecompile replaces the .pkl when it is up to date
+    # (with GROWWELL_COMPILED_MAX_ROWS, bulk calls go to the .pkl model, loaded on first use)
+    compiled = load_service_model("crop", path)
+    model = load_pickle(path) if compiled is None else None
+    # NumPy fast path (falls back to DataFrames when the model layout isn't supported)
+    return Predictor(model, list(CROP_FIELDS), sample_row=[INPUT_LIMITS[key][0] for key in CROP_FIELDS.values()],
+                     compiled=compiled, label_name=_crop_name,
+                     load_model=lambda: load_pickle(path))
+
+# Loaded on first use; a missing or broken file only disables the crop endpoints
+registry.register("crop", _load_model)
+
+# Repeated inputs are answered without touching the model
+cache = prediction_cache("crop", MODEL_PATHS["crop"])
+
+# Precomputed answers for hot input regions (python -m backend.core.lookup), checked before the cache
+lookup = lookup_table("crop", MODEL_PATHS["crop"])
+
+# Concurrent single-record requests share one predict call when enabled; only the
+# inference pool's threads call it, so a batch is flushed once all of them are waiting
+batcher = MicroBatcher("crop", lambda rows: registry.get("crop", allow_candidate=False).predict_rows(rows),
+                       max_callers=inference.callers) if MICROBATCH_ENABLED else None
+
+def _crop_name(pred_index):
+    pred_index = int(pred_index)
+    return CROP_MAPPING[pred_index] if 0 <= pred_index < len(CROP_MAPPING) else "Unknown"
+
+def _ranked_crops(predictor, probabilities, k):
+    return [{"crop": name, "probability": probability}
+            for name, probability in rank_classes(probabilities, predictor.class_names, k)]
+
+# Compiled from INPUT_LIMITS once; arguments in validate_crop_inputs order
+CROP_RANGES = range_check((
+    ("n", "Nitrogen {} kg/ha"),
+    ("p", "Phosphorus {} kg/ha"),
+    ("k", "Potassium {} kg/ha"),
+    ("ph", "Soil pH {}"),
+    ("temperature", "Temperature {}°C"),
+    ("humidity", "Humidity {}%"),
+    ("rainfall", "Rainfall {} mm/day")
+))
 
 def validate_crop_inputs(n, p, k, ph, temperature, humidity, rainfall):
-    errors = []
-    if not (INPUT_LIMITS["n"][0] <= n <= INPUT_LIMITS["n"][1]):
-        errors.append(f"Nitrogen {n} kg/ha is out of range {INPUT_LIMITS['n']}")
-    if not (INPUT_LIMITS["p"][0] <= p <= INPUT_LIMITS["p"][1]):
-        errors.append(f"Phosphorus {p} kg/ha is out of range {INPUT_LIMITS['p']}")
-    if not (INPUT_LIMITS["k"][0] <= k <= INPUT_LIMITS["k"][1]):
-        errors.append(f"Potassium {k} kg/ha is out of range {INPUT_LIMITS['k']}")
-    if not (INPUT_LIMITS["ph"][0] <= ph <= INPUT_LIMITS["ph"][1]):
-        errors.append(f"Soil pH {ph} is out of range {INPUT_LIMITS['ph']}")
-    if not (INPUT_LIMITS["temperature"][0] <= temperature <= INPUT_LIMITS["temperature"][1]):
-        errors.append(f"Temperature {temperature}°C is out of range {INPUT_LIMITS['temperature']}")
-    if not (INPUT_LIMITS["humidity"][0] <= humidity <= INPUT_LIMITS["humidity"][1]):
-        errors.append(f"Humidity {humidity}% is out of range {INPUT_LIMITS['humidity']}")
-    if not (INPUT_LIMITS["rainfall"][0] <= rainfall <= INPUT_LIMITS["rainfall"][1]):
-        errors.append(f"Rainfall {rainfall} mm/day is out of range {INPUT_LIMITS['rainfall']}")
-    return errors
-
-def recommend_crop(n, p, k, ph, temperature, humidity, rainfall):
+    return CROP_RANGES.errors((n, p, k, ph, temperature, humidity, rainfall))
+
+def recommend_crop(n, p, k, ph, temperature, humidity, rainfall, top_k=None):
+    """
+    Recommended crop name, or with top_k the top_k most probable crops as
+    [{"crop": name, "probability": p}, ...] from one predict_proba call.
+    """
+    return _recommend_crop(n, p, k, ph, temperature, humidity, rainfall, top_k, validate=True)
+
+def recommend_crop_validated(n, p, k, ph, temperature, humidity, rainfall, top_k=None):
+    """recommend_crop for inputs already checked against INPUT_LIMITS (e.g. by CropInput)."""
+    return _recommend_crop(n, p, k, ph, temperature, humidity, rainfall, top_k, validate=False)
+
+def _recommend_crop(n, p, k, ph, temperature, humidity, rainfall, top_k, validate):
     try:
-        errors = validate_crop_inputs(n, p, k, ph, temperature, humidity, rainfall)
-        if errors:
-            return {"error": "Invalid input values", "details": errors}
-
-        df = pd.DataFrame([{
-            "N": n,
-            "P": p,
-            "K": k,
-            "ph": ph,
-            "temperature": temperature,
-            "humidity": humidity,
-            "rainfall": rainfall
-        }])
-
-        pred_index = model.predict(df)[0]
-        pred_index = int(pred_index)
-        crop_name = CROP_MAPPING[pred_index] if 0 <= pred_index < len(CROP_MAPPING) else "Unknown"
-        return crop_name
+        if validate:
+            with span("recommend_crop", "validate"):
+                errors = validate_crop_inputs(n, p, k, ph, temperature, humidity, rainfall)
+            if errors:
+                count_error("recommend_crop", "invalid_input")
+                return {"error": "Invalid input values", "details": errors}
+
+        with span("recommend_crop", "model"):
+            predictor = registry.get("crop")
+
+        # Feature values in model column order (CROP_FIELDS)
+        row = (n, p, k, ph, temperature, humidity, rainfall)
+
+        if top_k:
+            return _ranked_crops(predictor, _probabilities("recommend_crop", predictor, row), top_k)
+
+        if lookup is not None:
+            with span("recommend_crop", "lookup"):
+                found, pred_index = lookup.get(row, predictor.id)
+            if found:
+                return _crop_name(pred_index)
+
+        if cache is not None:
+            with span("recommend_crop", "cache"):
+                key = cache.key(row, predictor.id)
+                found, pred_index = cache.get(key)
+            if found:
+                return _crop_name(pred_index)
+
+        with span("recommend_crop", "predict"):
+            if batcher is not None and predictor.role == "stable":
+                pred_index = batcher.submit(row)
+            else:
+                pred_index = predictor.predict_rows([row])[0]
+
+        if cache is not None:
+            cache.put(key, pred_index)
+        return _crop_name(pred_index)
+
+    except ModelUnavailable as e:
+        count_error("recommend_crop", "model_unavailable")
+        return {"error": "Crop model unavailable", "details": str(e)}
 
     except Exception as e:
+        count_error("recommend_crop", "exception")
         traceback.print_exc()
         return {"error": f"Crop prediction failed: {str(e)}"}
+
+def _probabilities(endpoint, predictor, row):
+    # Probabilities are cached per row (not per k), so any top_k reuses them
+    key = cache.key(row, (predictor.id, "proba")) if cache is not None else None
+    if key is not None:
+        with span(endpoint, "cache"):
+            found, probabilities = cache.get(key)
+        if found:
+            return probabilities
+    with span(endpoint, "predict"):
+        probabilities = predictor.predict_proba_rows([row])[0]
+    if key is not None:
+        cache.put(key, probabilities)
+    return probabilities
+
+def recommend_crop_batch(records, top_k=None, prepared=None):
+    """
+    Recommend crops for a list of CropInput-shaped dicts in one vectorized pass.
+    Returns a crop name (with top_k, the ranked list recommend_crop returns) or
+    an error dict per record, in input order.
+    """
+    try:
+        with span("recommend_crop_batch", "model"):
+            predictor = registry.get("crop")
+    except ModelUnavailable as e:
+        count_error("recommend_crop_batch", "model_unavailable", len(records))
+        return [{"error": "Crop model unavailable", "details": str(e)} for _ in records]
+
+    if top_k:
+        predict, format_result = predictor.predict_proba_frame, lambda row: _ranked_crops(predictor, row, top_k)
+    else:
+        predict, format_result = predictor.predict_frame, _crop_name
+
+    return run_batch(
+        records,
+        numeric_fields=CROP_FIELDS,
+        text_fields=(),
+        columns={field: field for field in CROP_FIELDS},
+        predict=predict,
+        format_result=format_result,
+        error_label="Crop prediction failed",
+        endpoint="recommend_crop_batch",
+        prepared=prepared
+    )
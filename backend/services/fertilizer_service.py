@@ -1,41 +1,179 @@
 # backend/services/fertilizer_service.py
-import joblib
-import pandas as pd
-from backend.core.config import MODEL_PATHS, FERTILIZER_MAPPING
+from backend.core.config import MODEL_PATHS, FERTILIZER_MAPPING, MICROBATCH_ENABLED
+from backend.core.batch import run_batch
+from backend.core.cache import prediction_cache
+from backend.core.executor import inference
+from backend.core.fastpath import Predictor, top_k as rank_classes
+from backend.core.lookup import lookup_table
+from backend.core.metrics import span, count_error
+from backend.core.microbatch import MicroBatcher
+from backend.core.registry import registry, load_pickle, ModelUnavailable
+from backend.core.treecompile import load_service_model
 
-# Load model
-try:
-    model = joblib.load(MODEL_PATHS["fertilizer"])
-except Exception as e:
-    raise RuntimeError(f"Failed to load fertilizer model: {str(e)}")
+# Batch record keys (FertilizerInput field names) -> INPUT_LIMITS keys
+FERTILIZER_NUMERIC_FIELDS = {
+    "Temparature": "temperature",
+    "Humidity": "humidity",
+    "Moisture": "soil_moisture",
+    "Nitrogen": "n",
+    "Potassium": "k",
+    "Phosphorous": "p"
+}
+FERTILIZER_TEXT_FIELDS = ("Soil_Type", "Crop_Type")
 
-def recommend_fertilizer(input_data: dict):
+# Batch record keys -> model training column names
+FERTILIZER_COLUMNS = {
+    "Temparature": "Temperature",
+    "Humidity": "Humidity",
+    "Moisture": "Soil_Moisture",
+    "Soil_Type": "Soil_Type",
+    "Crop_Type": "Crop_Type",
+    "Nitrogen": "Nitrogen",
+    "Potassium": "Potassium",
+    "Phosphorous": "Phosphorous"
+}
+
+def _load_model(path):
+    # The compiled .npz from backend.core.treecompile replaces the .pkl when it is up to date
+    # (with GROWWELL_COMPILED_MAX_ROWS, bulk calls go to the .pkl model, loaded on first use)
+    compiled = load_service_model("fertilizer", path)
+    model = load_pickle(path) if compiled is None else None
+    # NumPy fast path (falls back to DataFrames when the model layout isn't supported)
+    return Predictor(
+        model,
+        list(FERTILIZER_COLUMNS.values()),
+        sample_row=[25, 50, 30, "Loamy", "Maize", 50, 20, 30],
+        compiled=compiled,
+        load_model=lambda: load_pickle(path),
+        label_name=_fertilizer_name
+    )
+
+# Loaded on first use; a missing or broken file only disables the fertilizer endpoints
+registry.register("fertilizer", _load_model)
+
+# Repeated inputs are answered without touching the model
+cache = prediction_cache("fertilizer", MODEL_PATHS["fertilizer"])
+
+# Precomputed answers for hot input regions (python -m backend.core.lookup), checked before the cache
+lookup = lookup_table("fertilizer", MODEL_PATHS["fertilizer"])
+
+# Concurrent single-record requests share one predict call when enabled; only the
+# inference pool's threads call it, so a batch is flushed once all of them are waiting
+batcher = MicroBatcher("fertilizer", lambda rows: registry.get("fertilizer", allow_candidate=False).predict_rows(rows),
+                       max_callers=inference.callers) if MICROBATCH_ENABLED else None
+
+def _fertilizer_name(predicted_label):
+    try:
+        return FERTILIZER_MAPPING[int(predicted_label)]
+    except:
+        return str(predicted_label)
+
+def _ranked_fertilizers(predictor, probabilities, k):
+    return [{"fertilizer": name, "probability": probability}
+            for name, probability in rank_classes(probabilities, predictor.class_names, k)]
+
+def _probabilities(endpoint, predictor, row):
+    # Probabilities are cached per row (not per k), so any top_k reuses them
+    key = cache.key(row, (predictor.id, "proba")) if cache is not None else None
+    if key is not None:
+        with span(endpoint, "cache"):
+            found, probabilities = cache.get(key)
+        if found:
+            return probabilities
+    with span(endpoint, "predict"):
+        probabilities = predictor.predict_proba_rows([row])[0]
+    if key is not None:
+        cache.put(key, probabilities)
+    return probabilities
+
+def recommend_fertilizer(input_data: dict, top_k=None):
     """
     input_data keys (from Streamlit):
     'Temparature', 'Humidity', 'Moisture', 'Soil_Type', 'Crop_Type',
     'Nitrogen', 'Potassium', 'Phosphorous'
+
+    With top_k, returns the top_k most probable fertilizers as
+    [{"fertilizer": name, "probability": p}, ...] from one predict_proba call.
     """
 
     try:
-        # Convert input to DataFrame (1 row)
-        df = pd.DataFrame([input_data])
+        with span("recommend_fertilizer", "model"):
+            predictor = registry.get("fertilizer")
 
-        # Rename columns to match model training
-        df.rename(columns={
-            "Temparature": "Temperature",
-            "Moisture": "Soil_Moisture"
-        }, inplace=True)
+        # Feature values in model column order (FERTILIZER_COLUMNS)
+        row = tuple(input_data[field] for field in FERTILIZER_COLUMNS)
+
+        category_errors = predictor.category_errors(row)
+        if category_errors:
+            count_error("recommend_fertilizer", "invalid_input")
+            return {"error": "Invalid input values", "details": category_errors}
+
+        if top_k:
+            return _ranked_fertilizers(predictor, _probabilities("recommend_fertilizer", predictor, row), top_k)
+
+        if lookup is not None:
+            with span("recommend_fertilizer", "lookup"):
+                found, predicted_label = lookup.get(row, predictor.id)
+            if found:
+                return _fertilizer_name(predicted_label)
+
+        if cache is not None:
+            with span("recommend_fertilizer", "cache"):
+                key = cache.key(row, predictor.id)
+                found, predicted_label = cache.get(key)
+            if found:
+                return _fertilizer_name(predicted_label)
 
         # Predict numeric label
-        predicted_label = model.predict(df)[0]
+        with span("recommend_fertilizer", "predict"):
+            if batcher is not None and predictor.role == "stable":
+                predicted_label = batcher.submit(row)
+            else:
+                predicted_label = predictor.predict_rows([row])[0]
+
+        if cache is not None:
+            cache.put(key, predicted_label)
 
         # Map numeric label to fertilizer name
-        try:
-            predicted_fertilizer = FERTILIZER_MAPPING[int(predicted_label)]
-        except:
-            predicted_fertilizer = str(predicted_label)
+        return _fertilizer_name(predicted_label)
 
-        return predicted_fertilizer
+    except ModelUnavailable as e:
+        count_error("recommend_fertilizer", "model_unavailable")
+        return {"error": "Fertilizer model unavailable", "details": str(e)}
 
     except Exception as e:
+        count_error("recommend_fertilizer", "exception")
         return {"error": "Fertilizer prediction failed", "details": str(e)}
+
+def recommend_fertilizer_batch(records, top_k=None, prepared=None):
+    """
+    Recommend fertilizers for a list of input dicts (same keys as recommend_fertilizer)
+    in one vectorized pass. Returns {"fertilizer": name} (with top_k,
+    {"fertilizer": ranked list}) or an error dict per record, in input order.
+    """
+    try:
+        with span("recommend_fertilizer_batch", "model"):
+            predictor = registry.get("fertilizer")
+    except ModelUnavailable as e:
+        count_error("recommend_fertilizer_batch", "model_unavailable", len(records))
+        return [{"error": "Fertilizer model unavailable", "details": str(e)} for _ in records]
+
+    if top_k:
+        predict = predictor.predict_proba_frame
+        format_result = lambda row: {"fertilizer": _ranked_fertilizers(predictor, row, top_k)}
+    else:
+        predict = predictor.predict_frame
+        format_result = lambda label: {"fertilizer": _fertilizer_name(label)}
+
+    return run_batch(
+        records,
+        numeric_fields=FERTILIZER_NUMERIC_FIELDS,
+        text_fields=FERTILIZER_TEXT_FIELDS,
+        columns=FERTILIZER_COLUMNS,
+        predict=predict,
+        format_result=format_result,
+        error_label="Fertilizer prediction failed",
+        endpoint="recommend_fertilizer_batch",
+        check=predictor.category_error_rows,
+        prepared=prepared
+    )
@@ -1,74 +1,186 @@
 # backend/services/irrigation_service.py
 
-import pandas as pd
 import numpy as np
-import joblib
 import traceback
-from backend.core.config import MODEL_PATHS, INPUT_LIMITS
+from backend.core.config import MODEL_PATHS, MICROBATCH_ENABLED
+from backend.core.batch import run_batch
+from backend.core.cache import prediction_cache
+from backend.core.executor import inference
+from backend.core.fastpath import Predictor
+from backend.core.lookup import lookup_table
+from backend.core.metrics import span, count_error
+from backend.core.microbatch import MicroBatcher
+from backend.core.registry import registry, load_pickle, ModelUnavailable
+from backend.core.treecompile import load_service_model
+from backend.core.validation import range_check
 
-# Load the trained irrigation model
-try:
-    model = joblib.load(MODEL_PATHS["irrigation"])
-except Exception as e:
-    raise RuntimeError(f"Failed to load irrigation model: {str(e)}")
+# Batch record keys (IrrigationInput field names) -> INPUT_LIMITS keys
+IRRIGATION_NUMERIC_FIELDS = {
+    "Farm_Area": "farm_area",
+    "Soil_pH": "ph",
+    "Nitrogen": "n",
+    "Phosphorus": "p",
+    "Potassium": "k",
+    "Soil_Moisture": "soil_moisture",
+    "Temperature": "temperature",
+    "Rainfall": "rainfall"
+}
+IRRIGATION_TEXT_FIELDS = ("Region", "Crop_Type", "Soil_Type", "Season")
+
+# Batch record keys -> model training column names (dataset order)
+IRRIGATION_COLUMNS = {
+    "Region": "Region",
+    "Crop_Type": "Crop_Type",
+    "Soil_Type": "Soil_Type",
+    "Season": "Season",
+    "Farm_Area": "Farm_Area(acres)",
+    "Soil_pH": "Soil_pH",
+    "Nitrogen": "Nitrogen(kg/ha)",
+    "Phosphorus": "Phosphorus(kg/ha)",
+    "Potassium": "Potassium(kg/ha)",
+    "Soil_Moisture": "Soil_Moisture(%)",
+    "Temperature": "Temperature(°C)",
+    "Rainfall": "Rainfall(mm)"
+}
+
+def _load_model(path):
+    # The compiled .npz from backend.core.treecompile replaces the .pkl when it is up to date
+    # (with GROWWELL_COMPILED_MAX_ROWS, bulk calls go to the .pkl model, loaded on first use)
+    compiled = load_service_model("irrigation", path)
+    model = load_pickle(path) if compiled is None else None
+    # NumPy fast path (falls back to DataFrames when the model layout isn't supported)
+    return Predictor(
+        model,
+        list(IRRIGATION_COLUMNS.values()),
+        sample_row=["North India", "Wheat", "Loamy", "Rabi", 1.0, 6.5, 50, 30, 20, 30, 25, 10],
+        compiled=compiled,
+        load_model=lambda: load_pickle(path)
+    )
+
+# Loaded on first use; a missing or broken file only disables the irrigation endpoints
+registry.register("irrigation", _load_model)
+
+# Repeated inputs are answered without touching the model
+cache = prediction_cache("irrigation", MODEL_PATHS["irrigation"])
+
+# Precomputed answers for hot input regions (python -m backend.core.lookup), checked before the cache
+lookup = lookup_table("irrigation", MODEL_PATHS["irrigation"])
+
+# Concurrent single-record requests share one predict call when enabled; only the
+# inference pool's threads call it, so a batch is flushed once all of them are waiting
+batcher = MicroBatcher("irrigation", lambda rows: registry.get("irrigation", allow_candidate=False).predict_rows(rows),
+                       max_callers=inference.callers) if MICROBATCH_ENABLED else None
+
+def _water_volume(prediction):
+    if isinstance(prediction, np.generic):
+        prediction = prediction.item()
+    return round(float(prediction), 2)
+
+# Compiled from INPUT_LIMITS once; arguments in validate_irrigation_inputs order
+IRRIGATION_RANGES = range_check((
+    ("n", "Nitrogen {} kg/ha"),
+    ("p", "Phosphorus {} kg/ha"),
+    ("k", "Potassium {} kg/ha"),
+    ("ph", "Soil pH {}"),
+    ("temperature", "Temperature {}°C"),
+    ("rainfall", "Rainfall {} mm"),
+    ("soil_moisture", "Soil moisture {}%"),
+    ("farm_area", "Farm area {}")
+))
 
 def validate_irrigation_inputs(n, p, k, ph, temperature, rainfall, soil_moisture, farm_area):
-    errors = []
-
-    if not (INPUT_LIMITS["n"][0] <= n <= INPUT_LIMITS["n"][1]):
-        errors.append(f"Nitrogen {n} kg/ha is out of range {INPUT_LIMITS['n']}")
-    if not (INPUT_LIMITS["p"][0] <= p <= INPUT_LIMITS["p"][1]):
-        errors.append(f"Phosphorus {p} kg/ha is out of range {INPUT_LIMITS['p']}")
-    if not (INPUT_LIMITS["k"][0] <= k <= INPUT_LIMITS["k"][1]):
-        errors.append(f"Potassium {k} kg/ha is out of range {INPUT_LIMITS['k']}")
-    if not (INPUT_LIMITS["ph"][0] <= ph <= INPUT_LIMITS["ph"][1]):
-        errors.append(f"Soil pH {ph} is out of range {INPUT_LIMITS['ph']}")
-    if not (INPUT_LIMITS["temperature"][0] <= temperature <= INPUT_LIMITS["temperature"][1]):
-        errors.append(f"Temperature {temperature}°C is out of range {INPUT_LIMITS['temperature']}")
-    if not (INPUT_LIMITS["rainfall"][0] <= rainfall <= INPUT_LIMITS["rainfall"][1]):
-        errors.append(f"Rainfall {rainfall} mm is out of range {INPUT_LIMITS['rainfall']}")
-    if not (INPUT_LIMITS["soil_moisture"][0] <= soil_moisture <= INPUT_LIMITS["soil_moisture"][1]):
-        errors.append(f"Soil moisture {soil_moisture}% is out of range {INPUT_LIMITS['soil_moisture']}")
-    if not (INPUT_LIMITS["farm_area"][0] <= farm_area <= INPUT_LIMITS["farm_area"][1]):
-        errors.append(f"Farm area {farm_area} is out of range {INPUT_LIMITS['farm_area']}")
-
-    return errors
+    return IRRIGATION_RANGES.errors((n, p, k, ph, temperature, rainfall, soil_moisture, farm_area))
 
 def predict_irrigation(crop_type, soil_type, season, farm_area, soil_moisture,
                        temperature, rainfall, n, p, k, ph, region):
     """
     Predict irrigation water usage in cubic meters.
     """
+    return _predict_irrigation(crop_type, soil_type, season, farm_area, soil_moisture,
+                               temperature, rainfall, n, p, k, ph, region, validate=True)
 
+def predict_irrigation_validated(crop_type, soil_type, season, farm_area, soil_moisture,
+                                 temperature, rainfall, n, p, k, ph, region):
+    """predict_irrigation for inputs already checked against INPUT_LIMITS (e.g. by IrrigationInput)."""
+    return _predict_irrigation(crop_type, soil_type, season, farm_area, soil_moisture,
+                               temperature, rainfall, n, p, k, ph, region, validate=False)
+
+def _predict_irrigation(crop_type, soil_type, season, farm_area, soil_moisture,
+                        temperature, rainfall, n, p, k, ph, region, validate):
     try:
-        # Validate inputs
-        validation_errors = validate_irrigation_inputs(n, p, k, ph, temperature, rainfall, soil_moisture, farm_area)
-        if validation_errors:
-            return {"error": "Invalid input values", "details": validation_errors}
-
-        # Prepare dataframe with exact column names (matching dataset)
-        input_data = pd.DataFrame([{
-            "Region": region,
-            "Crop_Type": crop_type,
-            "Soil_Type": soil_type,
-            "Season": season,
-            "Farm_Area(acres)": farm_area,
-            "Soil_pH": ph,
-            "Nitrogen(kg/ha)": n,
-            "Phosphorus(kg/ha)": p,
-            "Potassium(kg/ha)": k,
-            "Soil_Moisture(%)": soil_moisture,
-            "Temperature(°C)": temperature,
-            "Rainfall(mm)": rainfall
-        }])
+        if validate:
+            with span("predict_irrigation", "validate"):
+                validation_errors = validate_irrigation_inputs(n, p, k, ph, temperature, rainfall, soil_moisture, farm_area)
+            if validation_errors:
+                count_error("predict_irrigation", "invalid_input")
+                return {"error": "Invalid input values", "details": validation_errors}
+
+        with span("predict_irrigation", "model"):
+            predictor = registry.get("irrigation")
+
+        # Feature values in dataset column order (IRRIGATION_COLUMNS)
+        row = (region, crop_type, soil_type, season, farm_area, ph, n, p, k,
+               soil_moisture, temperature, rainfall)
+
+        category_errors = predictor.category_errors(row)
+        if category_errors:
+            count_error("predict_irrigation", "invalid_input")
+            return {"error": "Invalid input values", "details": category_errors}
+
+        if lookup is not None:
+            with span("predict_irrigation", "lookup"):
+                found, prediction = lookup.get(row, predictor.id)
+            if found:
+                return _water_volume(prediction)
+
+        if cache is not None:
+            with span("predict_irrigation", "cache"):
+                key = cache.key(row, predictor.id)
+                found, prediction = cache.get(key)
+            if found:
+                return _water_volume(prediction)
 
         # Predict
-        prediction = model.predict(input_data)[0]
-        if isinstance(prediction, np.generic):
-            prediction = prediction.item()
+        with span("predict_irrigation", "predict"):
+            if batcher is not None and predictor.role == "stable":
+                prediction = batcher.submit(row)
+            else:
+                prediction = predictor.predict_rows([row])[0]
+
+        if cache is not None:
+            cache.put(key, prediction)
+        return _water_volume(prediction)
 
-        return round(float(prediction), 2)
+    except ModelUnavailable as e:
+        count_error("predict_irrigation", "model_unavailable")
+        return {"error": "Irrigation model unavailable", "details": str(e)}
 
     except Exception as e:
+        count_error("predict_irrigation", "exception")
         traceback.print_exc()
         return {"error": f"Irrigation prediction failed: {str(e)}"}
+
+def predict_irrigation_batch(records, prepared=None):
+    """
+    Predict irrigation water usage for a list of IrrigationInput-shaped dicts in one
+    vectorized pass. Returns cubic meters or an error dict per record, in input order.
+    """
+    try:
+        with span("predict_irrigation_batch", "model"):
+            predictor = registry.get("irrigation")
+    except ModelUnavailable as e:
+        count_error("predict_irrigation_batch", "model_unavailable", len(records))
+        return [{"error": "Irrigation model unavailable", "details": str(e)} for _ in records]
+
+    return run_batch(
+        records,
+        numeric_fields=IRRIGATION_NUMERIC_FIELDS,
+        text_fields=IRRIGATION_TEXT_FIELDS,
+        columns=IRRIGATION_COLUMNS,
+        predict=predictor.predict_frame,
+        format_result=_water_volume,
+        error_label="Irrigation prediction failed",
+        endpoint="predict_irrigation_batch",
+        check=predictor.category_error_rows,
+        prepared=prepared
+    )
@@ -0,0 +1,255 @@
+# backend/services/plan_service.py
+
+import asyncio
+import time
+from backend.core.batch import prepare_batch
+from backend.core.executor import inference
+from backend.core.metrics import span, count_error
+from backend.core.registry import registry, ModelUnavailable
+from backend.services.crop_service import CROP_FIELDS, recommend_crop_validated, recommend_crop_batch
+from backend.services.fertilizer_service import recommend_fertilizer, recommend_fertilizer_batch
+from backend.services.irrigation_service import predict_irrigation_validated, predict_irrigation_batch
+from backend.services.weather_service import complete_record, complete_records
+
+# Plan profile keys (PlanInput field names) -> INPUT_LIMITS keys
+PLAN_NUMERIC_FIELDS = {
+    "N": "n",
+    "P": "p",
+    "K": "k",
+    "ph": "ph",
+    "temperature": "temperature",
+    "humidity": "humidity",
+    "rainfall": "rainfall",
+    "soil_moisture": "soil_moisture",
+    "farm_area": "farm_area"
+}
+PLAN_TEXT_FIELDS = ("soil_type", "region", "season")
+
+# Plan profile keys -> each model's record keys (Crop_Type comes from the plan's crop)
+PLAN_CROP_FIELDS = {field: field for field in CROP_FIELDS}
+PLAN_FERTILIZER_FIELDS = {
+    "temperature": "Temparature",
+    "humidity": "Humidity",
+    "soil_moisture": "Moisture",
+    "soil_type": "Soil_Type",
+    "N": "Nitrogen",
+    "K": "Potassium",
+    "P": "Phosphorous"
+}
+PLAN_IRRIGATION_FIELDS = {
+    "region": "Region",
+    "soil_type": "Soil_Type",
+    "season": "Season",
+    "farm_area": "Farm_Area",
+    "ph": "Soil_pH",
+    "N": "Nitrogen",
+    "P": "Phosphorus",
+    "K": "Potassium",
+    "soil_moisture": "Soil_Moisture",
+    "temperature": "Temperature",
+    "rainfall": "Rainfall"
+}
+
+def _crop_type(model_name, crop):
+    # The model's spelling of crop (e.g. "maize" -> "Maize"), or None if it wasn't trained on it
+    return registry.get(model_name).canonical_category("Crop_Type", crop)
+
+def _skipped(model_name, crop):
+    return {"skipped": f"The {model_name} model has no crop type {crop!r}"}
+
+def plan_crop(profile):
+    return recommend_crop_validated(
+        n=profile["N"], p=profile["P"], k=profile["K"], ph=profile["ph"],
+        temperature=profile["temperature"], humidity=profile["humidity"], rainfall=profile["rainfall"]
+    )
+
+def plan_fertilizer(profile, crop):
+    try:
+        crop_type = _crop_type("fertilizer", crop)
+    except ModelUnavailable as e:
+        count_error("plan_fertilizer", "model_unavailable")
+        return {"error": "Fertilizer model unavailable", "details": str(e)}
+    if crop_type is None:
+        return _skipped("fertilizer", crop)
+    record = {key: profile[field] for field, key in PLAN_FERTILIZER_FIELDS.items()}
+    record["Crop_Type"] = crop_type
+    result = recommend_fertilizer(record)
+    if isinstance(result, dict):
+        return result
+    return {"crop_type": crop_type, "fertilizer": result}
+
+def plan_irrigation(profile, crop):
+    try:
+        crop_type = _crop_type("irrigation", crop)
+    except ModelUnavailable as e:
+        count_error("plan_irrigation", "model_unavailable")
+        return {"error": "Irrigation model unavailable", "details": str(e)}
+    if crop_type is None:
+        return _skipped("irrigation", crop)
+    result = predict_irrigation_validated(
+        crop_type, profile["soil_type"], profile["season"], profile["farm_area"], profile["soil_moisture"],
+        profile["temperature"], profile["rainfall"], profile["N"], profile["P"], profile["K"], profile["ph"],
+        profile["region"]
+    )
+    if isinstance(result, dict):
+        return result
+    return {"crop_type": crop_type, "water_m3": result}
+
+class _Stages:
+    """Runs plan stages on the inference pool under one deadline, timing each and collecting version headers."""
+
+    def __init__(self, timeout):
+        self.started = time.perf_counter()
+        self.deadline = self.started + (timeout or inference.timeout)
+        self.timings = {}
+        self.versions = []
+
+    async def run(self, stage, model_name, fn, *args):
+        started = time.perf_counter()
+        try:
+            result, headers = await inference.run(model_name, fn, *args,
+                                                  timeout=max(self.deadline - started, 0.001))
+        finally:
+            self.timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+        if "X-Model-Version" in headers:
+            self.versions.append(headers["X-Model-Version"])
+        return result
+
+    async def weather(self, complete, *args):
+        started = time.perf_counter()
+        try:
+            return await complete(*args)
+        finally:
+            self.timings["weather"] = round((time.perf_counter() - started) * 1000, 2)
+
+    def finish(self):
+        self.timings["total"] = round((time.perf_counter() - self.started) * 1000, 2)
+        headers = {"X-Model-Version": ", ".join(self.versions)} if self.versions else {}
+        return self.timings, headers
+
+async def plan(profile, timeout=None):
+    """
+    Crop, fertilizer and irrigation plan for one PlanInput-shaped profile
+    (already range-checked). Fertilizer and irrigation are planned for
+    profile["crop_type"] when given (all three models then run concurrently),
+    otherwise for the recommended crop once it is known. A crop a model's
+    Crop_Type vocabulary doesn't know skips that model. Returns (plan dict with
+    per-stage timings_ms, model version headers); raises ClimateInputError /
+    WeatherUnavailable when missing climate fields can't be filled.
+    """
+    stages = _Stages(timeout)
+    profile = await stages.weather(complete_record, "plan", profile)
+
+    crop_type = profile.get("crop_type")
+    if crop_type:
+        crop, fertilizer, irrigation = await asyncio.gather(
+            stages.run("crop", "crop", plan_crop, profile),
+            stages.run("fertilizer", "fertilizer", plan_fertilizer, profile, crop_type),
+            stages.run("irrigation", "irrigation", plan_irrigation, profile, crop_type)
+        )
+    else:
+        crop = await stages.run("crop", "crop", plan_crop, profile)
+        if isinstance(crop, dict):
+            skipped = {"skipped": "No crop was recommended"}
+            fertilizer, irrigation = skipped, skipped
+        else:
+            fertilizer, irrigation = await asyncio.gather(
+                stages.run("fertilizer", "fertilizer", plan_fertilizer, profile, crop),
+                stages.run("irrigation", "irrigation", plan_irrigation, profile, crop)
+            )
+
+    timings, headers = stages.finish()
+    return {"crop": crop, "fertilizer": fertilizer, "irrigation": irrigation, "timings_ms": timings}, headers
+
+def plan_crop_batch(records):
+    """
+    Validate plan records once and recommend crops for the valid ones.
+    Returns (crop results, the prepare_batch result for the later stages).
+    """
+    with span("plan_batch", "validate"):
+        prepared = prepare_batch(records, PLAN_NUMERIC_FIELDS, PLAN_TEXT_FIELDS)
+    frame, valid_rows, errors = prepared
+    crops = recommend_crop_batch(records, prepared=(frame.rename(columns=PLAN_CROP_FIELDS), valid_rows, errors))
+    return crops, prepared
+
+def _model_batch(model_name, fields, score, records, prepared, crops):
+    """
+    Score the validated plan rows whose crop (the record's crop_type, else the
+    recommended crop) model_name's Crop_Type vocabulary knows. Returns
+    (results, crop type per row); other rows get a skipped entry.
+    """
+    frame, valid_rows, errors = prepared
+    results = [None] * len(records)
+    crop_types = [None] * len(records)
+    try:
+        predictor = registry.get(model_name)
+    except ModelUnavailable as e:
+        count_error(f"plan_{model_name}_batch", "model_unavailable", len(valid_rows))
+        unavailable = {"error": f"{model_name.capitalize()} model unavailable", "details": str(e)}
+        return [unavailable for _ in records], crop_types
+
+    # One vocabulary lookup per distinct crop
+    resolved = {}
+    keep = []
+    for j, i in enumerate(valid_rows):
+        crop = records[i].get("crop_type") or crops[i]
+        if not isinstance(crop, str):
+            results[i] = {"skipped": "No crop was recommended"}
+            continue
+        if crop not in resolved:
+            resolved[crop] = predictor.canonical_category("Crop_Type", crop)
+        if resolved[crop] is None:
+            results[i] = _skipped(model_name, crop)
+            continue
+        crop_types[i] = resolved[crop]
+        keep.append(j)
+
+    subset = frame.iloc[keep].rename(columns=fields).reset_index(drop=True)
+    subset["Crop_Type"] = [crop_types[valid_rows[j]] for j in keep]
+    scored = score(records, prepared=(subset, valid_rows[keep], errors))
+    for i, result in enumerate(scored):
+        if result is not None:
+            results[i] = result
+    return results, crop_types
+
+def plan_fertilizer_batch(records, prepared, crops):
+    results, crop_types = _model_batch("fertilizer", PLAN_FERTILIZER_FIELDS, recommend_fertilizer_batch,
+                                       records, prepared, crops)
+    return [{"crop_type": crop_type, **result} if crop_type and "error" not in result else result
+            for result, crop_type in zip(results, crop_types)]
+
+def plan_irrigation_batch(records, prepared, crops):
+    results, crop_types = _model_batch("irrigation", PLAN_IRRIGATION_FIELDS, predict_irrigation_batch,
+                                       records, prepared, crops)
+    return [{"crop_type": crop_type, "water_m3": result} if crop_type and not isinstance(result, dict) else result
+            for result, crop_type in zip(results, crop_types)]
+
+async def plan_batch(records, timeout=None):
+    """
+    plan() for many profiles: records are validated once, crops recommended in
+    one batch, then fertilizer and irrigation scored as two concurrent batches.
+    Returns ({"results": one plan or error dict per record, "timings_ms": ...},
+    model version headers).
+    """
+    stages = _Stages(timeout)
+    records, weather_errors = await stages.weather(complete_records, "plan", records)
+
+    crops, prepared = await stages.run("crop", "crop", plan_crop_batch, records)
+    fertilizers, irrigations = await asyncio.gather(
+        stages.run("fertilizer", "fertilizer", plan_fertilizer_batch, records, prepared, crops),
+        stages.run("irrigation", "irrigation", plan_irrigation_batch, records, prepared, crops)
+    )
+
+    errors = prepared[2]
+    results = []
+    for i, crop in enumerate(crops):
+        if i in weather_errors:
+            results.append(weather_errors[i])
+        elif i in errors:
+            # Invalid profiles never reached a model (whose entry may be an unavailability error)
+            results.append({"error": "Invalid input values", "details": errors[i]})
+        else:
+            results.append({"crop": crop, "fertilizer": fertilizers[i], "irrigation": irrigations[i]})
+
+    timings, headers = stages.finish()
+    return {"results": results, "timings_ms": timings}, headers
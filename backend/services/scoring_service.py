@@ -0,0 +1,55 @@
+# backend/services/scoring_service.py
+
+from pydantic import ValidationError
+from backend.schemas.crop_input import CropInput
+from backend.schemas.fertilizer_input import FertilizerInput
+from backend.schemas.irrigation_input import IrrigationInput
+from backend.services.crop_service import recommend_crop_batch
+from backend.services.fertilizer_service import recommend_fertilizer_batch
+from backend.services.irrigation_service import predict_irrigation_batch
+
+# model name -> (input schema, batch scorer, batch result -> prediction value)
+SCORERS = {
+    "crop": (CropInput, recommend_crop_batch, lambda result: result),
+    "fertilizer": (FertilizerInput, recommend_fertilizer_batch, lambda result: result["fertilizer"]),
+    "irrigation": (IrrigationInput, predict_irrigation_batch, lambda result: result),
+}
+
+class InvalidRecord:
+    """Placeholder for an input record that could not be parsed (e.g. a malformed JSON line)."""
+
+    def __init__(self, message):
+        self.message = message
+
+def _validation_details(error):
+    return [f"{'.'.join(str(part) for part in e['loc']) or 'record'}: {e['msg']}" for e in error.errors()]
+
+def score_chunk(model_name, start, records):
+    """
+    Validate records against the model's input schema and score the valid ones
+    in one batch call. Returns one output row per record, in order:
+    {"index": start + i, "prediction": value} or {"index": ..., "error": ..., "details": ...}.
+    """
+    schema, score_batch, prediction = SCORERS[model_name]
+    results = [None] * len(records)
+    valid, positions = [], []
+    for i, record in enumerate(records):
+        if isinstance(record, InvalidRecord):
+            results[i] = {"error": "Invalid record", "details": [record.message]}
+            continue
+        try:
+            valid.append(schema.model_validate(record).model_dump(by_alias=True))
+            positions.append(i)
+        except ValidationError as e:
+            results[i] = {"error": "Invalid input values", "details": _validation_details(e)}
+
+    for i, result in zip(positions, score_batch(valid) if valid else []):
+        results[i] = result
+
+    rows = []
+    for offset, result in enumerate(results):
+        if isinstance(result, dict) and "error" in result:
+            rows.append({"index": start + offset, **result})
+        else:
+            rows.append({"index": start + offset, "prediction": prediction(result)})
+    return rows
@@ -0,0 +1,114 @@
+# backend/services/sweep_service.py
+
+import numpy as np
+from backend.core.config import INPUT_LIMITS, SWEEP_MAX_POINTS
+from backend.core.metrics import span, count_error
+from backend.services.crop_service import CROP_FIELDS, recommend_crop_batch
+from backend.services.fertilizer_service import FERTILIZER_NUMERIC_FIELDS, recommend_fertilizer_batch
+from backend.services.irrigation_service import IRRIGATION_NUMERIC_FIELDS, predict_irrigation_batch
+
+# model name -> (numeric fields -> INPUT_LIMITS keys, batch scorer, batch result -> prediction, is classifier)
+SWEEPS = {
+    "crop": (CROP_FIELDS, recommend_crop_batch, lambda result: result, True),
+    "fertilizer": (FERTILIZER_NUMERIC_FIELDS, recommend_fertilizer_batch, lambda result: result["fertilizer"], True),
+    "irrigation": (IRRIGATION_NUMERIC_FIELDS, predict_irrigation_batch, lambda result: result, False),
+}
+
+# Grid values are rounded so overlapping sweeps produce identical points (and cache keys)
+GRID_DECIMALS = 6
+
+def _axis_values(numeric_fields, sweep_range):
+    feature = sweep_range["feature"]
+    if feature not in numeric_fields:
+        return None, f"{feature} is not a numeric input of this model (one of {', '.join(numeric_fields)})"
+    low, high = INPUT_LIMITS[numeric_fields[feature]]
+    start, stop = sweep_range["start"], sweep_range["stop"]
+    if not (low <= start <= high and low <= stop <= high):
+        return None, f"{feature} range [{start:g}, {stop:g}] is outside {INPUT_LIMITS[numeric_fields[feature]]}"
+    return np.round(np.linspace(start, stop, sweep_range["steps"]), GRID_DECIMALS), None
+
+def _flips(labels, values):
+    # Adjacent points along a 1-D sweep where the recommendation changes
+    return [
+        {"between": [float(values[i]), float(values[i + 1])], "from": labels[i], "to": labels[i + 1]}
+        for i in range(len(labels) - 1) if labels[i] != labels[i + 1]
+    ]
+
+def _partial_dependence(features, axes, grid, class_names):
+    """
+    Per swept feature: the mean prediction at each of its values, averaged over
+    the other swept feature (the curve itself for 1-D sweeps). Classifiers get
+    the share of grid points per label instead of a mean.
+    """
+    summary = {}
+    for axis, feature in enumerate(features):
+        other = tuple(a for a in range(grid.ndim) if a != axis)
+        if class_names is None:
+            curve = grid.mean(axis=other) if other else grid
+            summary[feature] = {"mean": np.round(curve, 4).tolist()}
+        else:
+            flat = np.moveaxis(grid, axis, 0).reshape(len(axes[axis]), -1)
+            shares = {
+                name: np.round((flat == code).mean(axis=1), 4).tolist()
+                for code, name in enumerate(class_names) if (flat == code).any()
+            }
+            summary[feature] = {"label_share": shares}
+    return summary
+
+def run_sweep(model_name, base, ranges, partial_dependence=False):
+    """
+    Score base with one or two numeric features swept over evenly spaced values
+    in one batch. Returns the axes and the prediction grid (shape: steps per
+    axis). Classifier grids hold indexes into "labels"; 1-D classifier sweeps
+    also list the points where the label flips.
+    """
+    numeric_fields, score_batch, prediction, is_classifier = SWEEPS[model_name]
+    features = [r["feature"] for r in ranges]
+    if len(set(features)) != len(features):
+        return {"error": "Invalid sweep", "details": ["Each feature can be swept only once"]}
+
+    # Checked on the step counts so an oversized grid is refused before any axis is allocated
+    if np.prod([float(r["steps"]) for r in ranges]) > SWEEP_MAX_POINTS:
+        count_error("run_sweep", "invalid_input")
+        return {"error": "Invalid sweep", "details": [f"Grid has more than {SWEEP_MAX_POINTS} points"]}
+
+    axes, errors = [], []
+    for sweep_range in ranges:
+        values, error = _axis_values(numeric_fields, sweep_range)
+        axes.append(values)
+        if error:
+            errors.append(error)
+    if errors:
+        count_error("run_sweep", "invalid_input")
+        return {"error": "Invalid sweep", "details": errors}
+
+    with span("run_sweep", "grid"):
+        mesh = np.meshgrid(*axes, indexing="ij")
+        points = zip(*(m.ravel().tolist() for m in mesh))
+        records = [{**base, **dict(zip(features, point))} for point in points]
+
+    # Repeated grid points are answered by the model's prediction cache
+    results = score_batch(records)
+    for result in results:
+        if isinstance(result, dict) and "error" in result:
+            count_error("run_sweep", "invalid_input")
+            return result
+
+    with span("run_sweep", "summarize"):
+        shape = tuple(len(values) for values in axes)
+        predictions = [prediction(result) for result in results]
+        response = {"model": model_name, "axes": [{"feature": f, "values": v.tolist()} for f, v in zip(features, axes)]}
+        class_names = None
+        if is_classifier:
+            class_names, codes = np.unique(np.asarray(predictions, dtype=object).astype(str), return_inverse=True)
+            class_names = class_names.tolist()
+            grid = codes.reshape(shape)
+            response["labels"] = class_names
+            if grid.ndim == 1:
+                response["flips"] = _flips([class_names[c] for c in grid], axes[0])
+        else:
+            grid = np.asarray(predictions, dtype=float).reshape(shape)
+        response["predictions"] = grid.tolist()
+        if partial_dependence:
+            response["partial_dependence"] = _partial_dependence(features, axes, grid, class_names)
+    return response
@@ -0,0 +1,117 @@
+# backend/services/weather_service.py
+
+import asyncio
+from backend.core.validation import range_check
+from backend.core.weather import weather_cache, WeatherUnavailable
+
+# Model input key -> (weather field, INPUT_LIMITS key) for the climate inputs weather can supply
+CLIMATE_FIELDS = {
+    "crop": {
+        "temperature": ("temperature", "temperature"),
+        "humidity": ("humidity", "humidity"),
+        "rainfall": ("rainfall", "rainfall")
+    },
+    "fertilizer": {
+        "Temparature": ("temperature", "temperature"),
+        "Humidity": ("humidity", "humidity")
+    },
+    "irrigation": {
+        "Temperature": ("temperature", "temperature"),
+        "Rainfall": ("rainfall", "rainfall")
+    },
+    "plan": {
+        "temperature": ("temperature", "temperature"),
+        "humidity": ("humidity", "humidity"),
+        "rainfall": ("rainfall", "rainfall")
+    }
+}
+
+# None when GROWWELL_WEATHER_PROVIDER is "none"
+weather = weather_cache()
+
+class ClimateInputError(ValueError):
+    """Climate inputs are missing and can't be filled in (details lists why)."""
+
+    def __init__(self, details):
+        super().__init__("; ".join(details))
+        self.details = details
+
+def missing_fields(model_name, record):
+    return [field for field in CLIMATE_FIELDS[model_name] if record.get(field) is None]
+
+def _location(record):
+    latitude, longitude = record.get("latitude"), record.get("longitude")
+    if isinstance(latitude, (int, float)) and isinstance(longitude, (int, float)) \
+            and -90 <= latitude <= 90 and -180 <= longitude <= 180:
+        return latitude, longitude
+    return None
+
+def _unfillable(missing, location):
+    if location is None:
+        return [f"{field} is required (or give latitude and longitude to use the local weather)" for field in missing]
+    return [f"{field} is required (weather enrichment is not configured)" for field in missing]
+
+def fill(model_name, record, missing, forecast):
+    """Copy of record with the missing climate fields taken from forecast (a weather dict)."""
+    record = dict(record)
+    fields = [(field,) + CLIMATE_FIELDS[model_name][field] for field in missing]
+    absent = [field for field, source, _ in fields if source not in forecast]
+    if absent:
+        raise ClimateInputError([f"{field} is not reported by the weather provider" for field in absent])
+    for field, source, _ in fields:
+        record[field] = forecast[source]
+    # Weather readings can fall outside what the models were trained on
+    check = range_check(tuple((limit_key, f"{field} {{:g}} from the local weather") for field, _, limit_key in fields))
+    errors = check.errors([record[field] for field, _, _ in fields])
+    if errors:
+        raise ClimateInputError(errors)
+    return record
+
+async def complete_record(model_name, record):
+    """
+    record with any missing climate fields filled from the weather at its
+    latitude / longitude. Raises ClimateInputError when they can't be filled
+    and WeatherUnavailable when the lookup fails.
+    """
+    missing = missing_fields(model_name, record)
+    if not missing:
+        return record
+    location = _location(record)
+    if location is None or weather is None:
+        raise ClimateInputError(_unfillable(missing, location))
+    forecast = await asyncio.to_thread(weather.get, *location)
+    return fill(model_name, record, missing, forecast)
+
+async def complete_records(model_name, records):
+    """
+    Batch version of complete_record: the distinct weather cells of all records
+    needing enrichment are fetched concurrently. Returns (records, errors)
+    where errors maps the position of each record that couldn't be completed to
+    its error dict. Records without a location are passed on unchanged so batch
+    validation reports their missing fields.
+    """
+    if weather is None:
+        return records, {}
+    records = list(records)
+    pending = [i for i, record in enumerate(records)
+               if isinstance(record, dict) and missing_fields(model_name, record) and _location(record) is not None]
+    if not pending:
+        return records, {}
+
+    forecasts = await weather.prefetch([_location(records[i]) for i in pending])
+    errors = {}
+    for i, forecast in zip(pending, forecasts):
+        if isinstance(forecast, WeatherUnavailable):
+            errors[i] = {"error": "Weather unavailable", "details": str(forecast)}
+            continue
+        try:
+            records[i] = fill(model_name, records[i], missing_fields(model_name, records[i]), forecast)
+        except ClimateInputError as e:
+            errors[i] = {"error": "Invalid input values", "details": e.details}
+    return records, errors
+
+def with_errors(results, errors):
+    """Batch results with the entries of records that failed enrichment replaced by their errors."""
+    for i, error in errors.items():
+        results[i] = error
+    return results
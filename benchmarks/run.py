@@ -0,0 +1,320 @@
+# benchmarks/run.py
+"""
+Latency / throughput / memory benchmark for the services and the HTTP API.
+
+    python -m benchmarks.run [--quick] [--output results.json]
+    python -m benchmarks.run --compare baseline.json results.json
+
+Inputs are random records drawn from INPUT_LIMITS and the dashboard dropdown
+lists. Each service function is called directly, and each endpoint is called
+through an in-process ASGI client (no network), under three workloads:
+single (sequential single-record calls), batch (one call with many records)
+and concurrent (many single-record calls in flight). Models that fail to load
+are skipped and listed under "skipped". The prediction cache is disabled
+unless --cache is given, so repeated runs measure the model path.
+
+"cold_start" is measured in a fresh interpreter: seconds from process start
+until main.py is imported, until the startup warm-up finishes and until the
+first model prediction after it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+if "--cache" not in sys.argv:
+    os.environ.setdefault("GROWWELL_CACHE", "0")
+
+import numpy as np
+from backend.core.config import (
+    INPUT_LIMITS, REGIONS, SOIL_TYPES, SEASONS, F_SOIL_TYPES, F_CROP_TYPES
+)
+
+def _uniform(rng, key, integer):
+    low, high = INPUT_LIMITS[key]
+    value = rng.uniform(low, high)
+    return float(np.clip(round(value), low, high)) if integer else round(float(value), 2)
+
+def crop_record(rng, integer=False):
+    return {
+        "N": _uniform(rng, "n", integer),
+        "P": _uniform(rng, "p", integer),
+        "K": _uniform(rng, "k", integer),
+        "ph": _uniform(rng, "ph", False),
+        "temperature": _uniform(rng, "temperature", integer),
+        "humidity": _uniform(rng, "humidity", integer),
+        "rainfall": _uniform(rng, "rainfall", integer)
+    }
+
+def fertilizer_record(rng, integer=False):
+    return {
+        "Temparature": _uniform(rng, "temperature", integer),
+        "Humidity": _uniform(rng, "humidity", integer),
+        "Moisture": _uniform(rng, "soil_moisture", integer),
+        "Soil_Type": str(rng.choice(F_SOIL_TYPES)),
+        "Crop_Type": str(rng.choice(F_CROP_TYPES)),
+        "Nitrogen": _uniform(rng, "n", integer),
+        "Potassium": _uniform(rng, "k", integer),
+        "Phosphorous": _uniform(rng, "p", integer)
+    }
+
+def irrigation_record(rng, integer=False):
+    return {
+        "Region": str(rng.choice(REGIONS)),
+        "Crop_Type": str(rng.choice(F_CROP_TYPES)),
+        "Soil_Type": str(rng.choice(SOIL_TYPES)),
+        "Season": str(rng.choice(SEASONS)),
+        "Farm_Area": _uniform(rng, "farm_area", False),
+        "Soil_pH": _uniform(rng, "ph", False),
+        "Nitrogen": _uniform(rng, "n", integer),
+        "Phosphorus": _uniform(rng, "p", integer),
+        "Potassium": _uniform(rng, "k", integer),
+        "Soil_Moisture": _uniform(rng, "soil_moisture", integer),
+        "Temperature": _uniform(rng, "temperature", integer),
+        "Rainfall": _uniform(rng, "rainfall", integer)
+    }
+
+def _service_targets():
+    from backend.services.crop_service import recommend_crop, recommend_crop_batch
+    from backend.services.fertilizer_service import recommend_fertilizer, recommend_fertilizer_batch
+    from backend.services.irrigation_service import predict_irrigation, predict_irrigation_batch
+
+    def crop_single(r):
+        return recommend_crop(r["N"], r["P"], r["K"], r["ph"], r["temperature"], r["humidity"], r["rainfall"])
+
+    def irrigation_single(r):
+        return predict_irrigation(
+            crop_type=r["Crop_Type"], soil_type=r["Soil_Type"], season=r["Season"], farm_area=r["Farm_Area"],
+            soil_moisture=r["Soil_Moisture"], temperature=r["Temperature"], rainfall=r["Rainfall"],
+            n=r["Nitrogen"], p=r["Phosphorus"], k=r["Potassium"], ph=r["Soil_pH"], region=r["Region"]
+        )
+
+    # name -> (record generator, single call, batch call, single endpoint, batch endpoint)
+    return {
+        "crop": (crop_record, crop_single, recommend_crop_batch, "/crop/recommend", "/crop/recommend/batch"),
+        "fertilizer": (fertilizer_record, recommend_fertilizer, recommend_fertilizer_batch,
+                       "/fertilizer/recommend", "/fertilizer/recommend/batch"),
+        "irrigation": (irrigation_record, irrigation_single, predict_irrigation_batch,
+                       "/irrigation/predict", "/irrigation/predict/batch"),
+    }
+
+def summarize(name, target, workload, latencies, elapsed, rows):
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return {
+        "name": name,
+        "target": target,
+        "workload": workload,
+        "calls": len(latencies),
+        "rows": rows,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "mean_ms": float(latencies_ms.mean()),
+        "calls_per_s": len(latencies) / elapsed,
+        "rows_per_s": rows / elapsed
+    }
+
+def _timed(fn, arg):
+    started = time.perf_counter()
+    result = fn(arg)
+    return time.perf_counter() - started, result
+
+def _check(result):
+    results = result.get("results", [result]) if isinstance(result, dict) else [result]
+    for item in results:
+        if isinstance(item, dict) and "error" in item:
+            raise RuntimeError(str(item))
+
+def bench_service(name, spec, rng, n_single, batch_size, n_batches, concurrency):
+    make, single, batch, _, _ = spec
+    records = [make(rng) for _ in range(n_single)]
+    _check(single(records[0]))  # also loads the model
+    out = []
+
+    started = time.perf_counter()
+    latencies = [_timed(single, r)[0] for r in records]
+    out.append(summarize(name, "service", "single", latencies, time.perf_counter() - started, len(records)))
+
+    batches = [[make(rng) for _ in range(batch_size)] for _ in range(n_batches)]
+    started = time.perf_counter()
+    latencies = [_timed(batch, b)[0] for b in batches]
+    out.append(summarize(name, "service", f"batch{batch_size}", latencies,
+                         time.perf_counter() - started, batch_size * n_batches))
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        latencies = [t for t, _ in pool.map(lambda r: _timed(single, r), records)]
+        elapsed = time.perf_counter() - started
+    out.append(summarize(name, "service", f"concurrent{concurrency}", latencies, elapsed, len(records)))
+    return out
+
+async def _bench_http(specs, rng, n_single, batch_size, n_batches, concurrency):
+    import httpx
+    from main import app
+
+    out = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def post(path, payload):
+                started = time.perf_counter()
+                response = await client.post(path, json=payload)
+                response.raise_for_status()
+                return time.perf_counter() - started
+
+            for name, (make, _, _, single_path, batch_path) in specs.items():
+                records = [make(rng) for _ in range(n_single)]
+                await post(single_path, records[0])
+
+                started = time.perf_counter()
+                latencies = [await post(single_path, r) for r in records]
+                out.append(summarize(name, "http", "single", latencies, time.perf_counter() - started, len(records)))
+
+                batches = [[make(rng) for _ in range(batch_size)] for _ in range(n_batches)]
+                started = time.perf_counter()
+                latencies = [await post(batch_path, b) for b in batches]
+                out.append(summarize(name, "http", f"batch{batch_size}", latencies,
+                                     time.perf_counter() - started, batch_size * n_batches))
+
+                limit = asyncio.Semaphore(concurrency)
+
+                async def limited(record):
+                    async with limit:
+                        return await post(single_path, record)
+
+                started = time.perf_counter()
+                latencies = await asyncio.gather(*[limited(r) for r in records])
+                out.append(summarize(name, "http", f"concurrent{concurrency}", latencies,
+                                     time.perf_counter() - started, len(records)))
+    return out
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Run in a fresh interpreter by cold_start()
+COLD_START_SCRIPT = """
+import json
+import main
+from backend.core.startup import startup
+startup.warm_up(main.registry)
+for name in main.registry.names():
+    if "error" not in startup.models[name]:
+        version = main.registry.get(name, allow_candidate=False)
+        version.predict_rows([version.predictor.sample_row])
+        break
+print(json.dumps(startup.stats()))
+"""
+
+def cold_start():
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT], capture_output=True, text=True)
+    if output.returncode != 0:
+        return {"error": output.stderr.strip().splitlines()[-1:]}
+    stats = json.loads(output.stdout.strip().splitlines()[-1])
+    return {"seconds": stats["seconds"], "models": stats["models"], "wall_seconds": time.perf_counter() - started}
+
+def run(args):
+    from backend.core.registry import current_rss, registry, ModelUnavailable
+
+    rng = np.random.default_rng(args.seed)
+    cold = cold_start()
+    rss_start = current_rss()
+    import_started = time.perf_counter()
+    specs = _service_targets()
+    import_seconds = time.perf_counter() - import_started
+
+    available, skipped = {}, {}
+    for name, spec in specs.items():
+        try:
+            registry.get(name, allow_candidate=False)
+            available[name] = spec
+        except ModelUnavailable as e:
+            skipped[name] = str(e)
+
+    results = []
+    for name, spec in available.items():
+        results += bench_service(name, spec, rng, args.single, args.batch_size, args.batches, args.concurrency)
+    if not args.no_http:
+        results += asyncio.run(_bench_http(available, rng, args.single, args.batch_size, args.batches, args.concurrency))
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "settings": {key: value for key, value in sorted(os.environ.items()) if key.startswith("GROWWELL_")},
+            "args": vars(args)
+        },
+        "memory": {
+            "rss_start_bytes": rss_start,
+            "rss_end_bytes": current_rss(),
+            "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            "service_import_seconds": import_seconds
+        },
+        "cold_start": cold,
+        "skipped": skipped,
+        "results": results
+    }
+
+def compare(baseline_path, current_path):
+    with open(baseline_path) as f:
+        baseline = {(r["name"], r["target"], r["workload"]): r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+    print(f"{'benchmark':45} {'p50 ms':>17} {'p99 ms':>17} {'rows/s':>21}")
+    for r in current:
+        key = (r["name"], r["target"], r["workload"])
+        old = baseline.get(key)
+        label = "/".join(key)
+        if old is None:
+            print(f"{label:45} {r['p50_ms']:17.3f} {r['p99_ms']:17.3f} {r['rows_per_s']:21.0f}")
+            continue
+        print(f"{label:45} {old['p50_ms']:7.3f}->{r['p50_ms']:<9.3f} {old['p99_ms']:7.3f}->{r['p99_ms']:<9.3f}"
+              f" {old['rows_per_s']:9.0f}->{r['rows_per_s']:<11.0f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--single", type=int, default=500, help="single-record calls per model")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--batches", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-http", action="store_true", help="only call the service functions")
+    parser.add_argument("--cache", action="store_true", help="keep the prediction cache enabled")
+    parser.add_argument("--quick", action="store_true", help="small run for smoke-testing")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+    if args.quick:
+        args.single, args.batch_size, args.batches = 50, 200, 3
+
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for r in report["results"]:
+        print(f"{r['name']:10} {r['target']:7} {r['workload']:13} p50 {r['p50_ms']:8.3f} ms  "
+              f"p95 {r['p95_ms']:8.3f} ms  p99 {r['p99_ms']:8.3f} ms  {r['rows_per_s']:10.0f} rows/s")
+    for milestone, seconds in report["cold_start"].get("seconds", {}).items():
+        print(f"cold start {milestone:16} {seconds:8.3f} s after process start")
+    for name, reason in report["skipped"].items():
+        print(f"{name:10} skipped: {reason}")
+    print(f"max RSS {report['memory']['max_rss_bytes'] / 2**20:.0f} MiB -> {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,91 @@
 # main.py
 
-from fastapi import FastAPI
-from backend.routes import crop, fertilizer, irrigation
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from backend.core.config import MODEL_RELOAD_ENABLED, PROFILER_ENABLED, WARMUP_ENABLED, WARMUP_MODELS
+from backend.core.executor import inference
+from backend.core.metrics import collect_stats, render_prometheus
+from backend.core.profiler import profiler, install_signal_toggle
+from backend.core.registry import registry
+from backend.core.startup import startup
+from backend.routes import crop, fertilizer, irrigation, plan, score, sweep
 
-app = FastAPI(title="GrowWell API - Smart Farming")
+@asynccontextmanager
+async def lifespan(app):
+    # Swap retrained models in without a restart
+    if MODEL_RELOAD_ENABLED:
+        registry.start_watcher()
+    if PROFILER_ENABLED:
+        install_signal_toggle()
+    # Models load in the background; /ready reports when they are warm
+    # (already done by the parent process under backend.core.prefork)
+    if WARMUP_ENABLED and not startup.ready.is_set():
+        startup.start_warm_up(registry, WARMUP_MODELS)
+    else:
+        startup.ready.set()
+    yield
+    registry.stop_watcher()
+    inference.shutdown()
+
+app = FastAPI(title="GrowWell API - Smart Farming", lifespan=lifespan)
 
 app.include_router(crop.router)
 app.include_router(fertilizer.router)
 app.include_router(irrigation.router)
+app.include_router(plan.router)
+app.include_router(score.router)
+app.include_router(sweep.router)
 
 @app.get("/")
 def health():
     return {"status": "ok"}
+
+@app.get("/ready")
+def ready():
+    # 503 until the startup warm-up has loaded and exercised the models (for readiness probes)
+    status = startup.stats()
+    if not status["ready"]:
+        return JSONResponse(status, status_code=503)
+    return status
+
+@app.get("/stats")
+def stats():
+    # Scheduler and cache counters for tuning
+    return collect_stats()
+
+@app.get("/models")
+def models():
+    # Versions being served, load time, RSS growth, latency and prediction mix per model
+    return registry.status()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Stage timings, error counts, model loads, cache and executor stats for Prometheus
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+def _require_profiler():
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled (set GROWWELL_PROFILER=1)")
+
+@app.post("/debug/profile/start")
+def profile_start(seconds: float = None, interval_ms: float = None):
+    # Profiles only the worker process that serves this request (see "pid")
+    _require_profiler()
+    if not profiler.start(seconds, interval_ms):
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    return profiler.stats()
+
+@app.post("/debug/profile/stop")
+def profile_stop():
+    _require_profiler()
+    profiler.stop()
+    return profiler.stats()
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+def profile_result():
+    # Folded stacks of the last profile of this worker (flamegraph.pl / speedscope)
+    _require_profiler()
+    return PlainTextResponse(profiler.folded())
+
+startup.mark("import")
@@ -0,0 +1,69 @@
+# tests/test_treecompile.py
+
+import os
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+joblib = pytest.importorskip("joblib")
+pytest.importorskip("xgboost")
+
+from backend.core.config import MODEL_PATHS
+from backend.core.fastpath import Predictor
+from backend.core.treecompile import export_model, load_compiled, random_rows, service_specs
+
+SPECS = service_specs()
+BULK_MIN_ROWS = 8
+
+def _models():
+    return [name for name in SPECS if os.path.exists(MODEL_PATHS[name])]
+
+@pytest.fixture(scope="module", params=_models())
+def compiled(request, tmp_path_factory):
+    name = request.param
+    columns, limit_keys = SPECS[name]
+    model = joblib.load(MODEL_PATHS[name])
+    path = str(tmp_path_factory.mktemp("compiled") / f"{name}.npz")
+    export_model(model, columns, MODEL_PATHS[name], path)
+    # No fallbacks: unseen categories must hit the encoder's own unknown handling, as in model.predict
+    predictor = load_compiled(path, fallbacks={})
+    rows = random_rows(columns, limit_keys, predictor.blocks, 2000, seed=1)
+    return model, predictor, rows, pd.DataFrame(rows, columns=columns)
+
+def _assert_predictions_match(actual, expected):
+    actual, expected = np.asarray(actual), np.asarray(expected)
+    if expected.dtype.kind in "iub":
+        np.testing.assert_array_equal(actual, expected)
+    else:
+        np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-3)
+
+def test_predict_matches_model(compiled):
+    model, predictor, rows, frame = compiled
+    _assert_predictions_match(predictor.predict_rows(rows), model.predict(frame))
+
+def test_predict_proba_matches_model(compiled):
+    model, predictor, rows, frame = compiled
+    if not hasattr(model, "predict_proba"):
+        pytest.skip("regressor")
+    np.testing.assert_allclose(predictor.predict_proba_rows(rows), model.predict_proba(frame), atol=1e-5)
+
+def test_single_rows_match_batch(compiled):
+    _, predictor, rows, _ = compiled
+    batch = np.asarray(predictor.predict_rows(rows[:50]))
+    single = np.asarray([predictor.predict_rows([row])[0] for row in rows[:50]])
+    np.testing.assert_array_equal(single, batch)
+
+@pytest.mark.parametrize("n_rows", [BULK_MIN_ROWS, BULK_MIN_ROWS + 1])
+def test_native_fallback_matches_compiled(compiled, n_rows):
+    # Calls of up to compiled_max_rows rows stay compiled, bigger ones load the native model
+    model, fast, rows, frame = compiled
+    loads = []
+    predictor = Predictor(None, fast.columns, rows[0], compiled=fast, compiled_max_rows=BULK_MIN_ROWS,
+                          load_model=lambda: loads.append(1) or model)
+    expected = model.predict(frame.iloc[:n_rows])
+    _assert_predictions_match(predictor.predict_rows(rows[:n_rows]), expected)
+    _assert_predictions_match(predictor.predict_frame(frame.iloc[:n_rows]), expected)
+    assert len(loads) == (n_rows > BULK_MIN_ROWS)
+    if hasattr(model, "predict_proba"):
+        np.testing.assert_allclose(predictor.predict_proba_rows(rows[:n_rows]),
+                                   fast.predict_proba_rows(rows[:n_rows]), atol=1e-5)
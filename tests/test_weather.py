@@ -0,0 +1,68 @@
+# tests/test_weather.py
+
+import asyncio
+import time
+import pytest
+
+from backend.core.weather import MemoryProvider, WeatherCache, cell_center, geohash
+from backend.services import weather_service
+
+CELL = "tdr1v"
+WEATHER = {"temperature": 27.5, "humidity": 60.0, "rainfall": 3.0}
+
+class GatedProvider(MemoryProvider):
+    """MemoryProvider whose fetch waits until `waiters` other lookups are coalesced onto it."""
+
+    def __init__(self, table, waiters):
+        super().__init__(table)
+        self.waiters = waiters
+        self.cache = None
+
+    def fetch(self, latitude, longitude):
+        deadline = time.monotonic() + 5
+        while self.cache.coalesced < self.waiters and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return super().fetch(latitude, longitude)
+
+@pytest.fixture
+def weather(monkeypatch):
+    def install(provider):
+        # One time bucket for the whole test
+        cache = WeatherCache(provider, precision=len(CELL), bucket_seconds=10 ** 9)
+        monkeypatch.setattr(weather_service, "weather", cache)
+        return cache
+    return install
+
+def _record(latitude, longitude):
+    return {"N": 50, "P": 40, "K": 40, "ph": 6.5, "latitude": latitude, "longitude": longitude}
+
+def test_concurrent_lookups_for_one_cell_share_one_fetch(weather):
+    callers = 5
+    provider = GatedProvider({CELL: WEATHER}, waiters=callers - 1)
+    cache = provider.cache = weather(provider)
+    latitude, longitude = cell_center(CELL)
+
+    async def complete_all():
+        return await asyncio.gather(*(
+            weather_service.complete_record("crop", _record(latitude + 0.001 * i, longitude))
+            for i in range(callers)
+        ))
+
+    records = asyncio.run(complete_all())
+    assert all(record["temperature"] == WEATHER["temperature"] for record in records)
+    assert provider.fetches == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == callers - 1
+
+def test_points_in_one_cell_hit_the_cache(weather):
+    provider = MemoryProvider({CELL: WEATHER})
+    cache = weather(provider)
+    latitude, longitude = cell_center(CELL)
+    near = (latitude + 0.005, longitude - 0.005)
+    assert geohash(*near, len(CELL)) == CELL
+
+    asyncio.run(weather_service.complete_record("crop", _record(latitude, longitude)))
+    record = asyncio.run(weather_service.complete_record("crop", _record(*near)))
+    assert record["rainfall"] == WEATHER["rainfall"]
+    assert provider.fetches == 1
+    assert cache.stats()["hits"] == 1